@@ -8,14 +8,15 @@ os.system("cls" if os.name == "nt" else "clear")
 
 import sys
 import time
-import json
+import asyncio
+import re
 import signal
-from urllib import request, parse
+import threading
+from collections import deque
 
-try:
-    import requests
-except Exception:
-    requests = None
+# Shared Webdis client: repo root in a checkout, or a copy of webdislib/ next to this file
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from webdislib import WebdisHealth, connect, truthy
 
 # === ANSI COLORS ===
 GREEN = "\033[32m"
@@ -24,7 +25,35 @@ RESET = "\033[0m"
 
 # === CONFIG ===
 WEBDIS_BASE = "http://192.168.30.114:7379"
+REDIS_URL = None  # e.g. "redis://192.168.30.114:6379" to talk RESP directly, Webdis as fallback
 TIMEOUT = 5
+HEALTH_DOWN_TTL = 2.0      # seconds to fail fast after Webdis stops answering
+HEALTH_BACKOFF_MAX = 20.0  # cap for the doubling fail-fast window
+MGET_BATCH = 128  # max keys per MGET URL
+KEY_SHAPE_TTL = 300  # seconds before the room-flag key shape is rediscovered
+
+# Optional background state mirror fed by the AppDaemon bridge's pub/sub channels
+STATE_MIRROR = False
+ROOM_PUB_CHANNEL = "rpg2025_room_updates"
+ROOM_KEY_PREFIX = "rpg2025_room_"  # the bridge's resolved per-room state keys, re-read on resync
+PHASE_PUB_CHANNEL = "orbit_phase_updates"
+LAYER_PUB_CHANNEL = "orbit_layer_updates"
+MIRROR_RESYNC_SEC = 30    # full re-read of every mirrored key
+MIRROR_MAX_AGE = 120      # serve from memory while the last resync is younger than this
+MIRROR_STREAM_IDLE = 300  # reconnect the SUBSCRIBE stream after this much silence
+
+# Boot profile: "full", "short" or "instant" (skip straight to the prompt).
+# WY_BOOT_PROFILE overrides; otherwise a marker younger than BOOT_RESUME_WINDOW means "instant".
+BOOT_PROFILES = ("full", "short", "instant")
+BOOT_PROFILE_ENV = "WY_BOOT_PROFILE"
+BOOT_MARKER = "/tmp/wy_terminal.booted"
+BOOT_RESUME_WINDOW = 12 * 3600  # seconds
+BOOT_SHORT_SCALE = 0.2          # delay multiplier for the abbreviated boot
+TYPE_FPS = 30                   # typewriter flushes per second
+
+# Non-blocking asyncio REPL: Webdis queries run off the prompt and Ctrl-C cancels them
+ASYNC_REPL = False
+QUERY_INDICATOR_DELAY = 0.15  # seconds before the "querying…" indicator appears
 
 # === CONSTANTS ===
 SYSTEM_ERROR_MSG = (
@@ -50,6 +79,8 @@ ROOMS = [
     "Reactor_Core_Room",
 ]
 ROOM_STATES = ["ok", "fire", "breach"]
+# Composite states the bridge's hazard_rules may publish -> the ROOM_STATES flags they imply
+ROOM_STATE_FLAGS = {"inferno": ("fire", "breach")}
 
 # Phases defined but intentionally unused for now
 PHASE_KEYS = ["Phase1", "Phase2", "Phase3", "Phase4"]
@@ -67,6 +98,12 @@ STORAGE_KEYS = [
     "STORAGE:LITHIUM_KG",
 ]
 LOW_STORAGE_THRESHOLD = 100.0  # kg
+STORAGE_HISTORY = 32           # samples kept per resource for rate-of-change
+STORAGE_MIN_SPAN = 10.0        # seconds of history needed before showing a rate
+STORAGE_WARN_HORIZON = 900     # warn when a resource will hit the threshold sooner than this
+
+# --- Distress beacon keys ---
+BEACON_KEYS = ["distress_beacon_available", "distress_beacon_on", "distress_beacon"]
 
 # === ASCII LOGO (yellow) ===
 LOGO_ASCII = r"""
@@ -95,33 +132,74 @@ def ignore_signals():
         if hasattr(signal, sig):
             signal.signal(getattr(signal, sig), handler)
 
+# === BOOT PROFILE ===
+# Multiplier applied to every boot-time delay; 0 prints instantly.
+_pace = {"scale": 1.0}
+
+def select_boot_profile():
+    """
+    Pick full / short / instant. The env var wins; otherwise a recent boot marker
+    (left by a previous run, e.g. before a crash or systemd restart) resumes instantly.
+    """
+    env = os.environ.get(BOOT_PROFILE_ENV, "").strip().lower()
+    if env in BOOT_PROFILES:
+        return env
+    try:
+        age = time.time() - os.path.getmtime(BOOT_MARKER)
+    except OSError:
+        return "full"
+    return "instant" if age < BOOT_RESUME_WINDOW else "full"
+
+def mark_booted():
+    try:
+        with open(BOOT_MARKER, "w") as f:
+            f.write(f"{time.time():.0f}\n")
+    except OSError:
+        pass
+
+def _pause(seconds):
+    if _pace["scale"] > 0:
+        time.sleep(seconds * _pace["scale"])
+
 # === UTILS: slow typing, progress bars, etc. ===
 def type_out(s: str, cps: int = 80, end: str = "\n", color: str = GREEN):
-    """Typewriter output at roughly cps chars/sec."""
-    delay = 1.0 / max(10, cps)
-    for ch in s:
-        sys.stdout.write((color or "") + ch + (RESET if color else ""))
-        sys.stdout.flush()
-        time.sleep(delay)
-    sys.stdout.write(end)
-    sys.stdout.flush()
+    """Typewriter output at roughly cps chars/sec, flushed in TYPE_FPS batches rather than per char."""
+    out = sys.stdout
+    out.write(color or "")
+    if _pace["scale"] <= 0:
+        out.write(s)
+    else:
+        cps = max(10, cps) / _pace["scale"]
+        per_frame = max(1, round(cps / TYPE_FPS))
+        frame = per_frame / cps
+        deadline = time.monotonic()
+        for i in range(0, len(s), per_frame):
+            out.write(s[i:i + per_frame])
+            out.flush()
+            # Sleep to an absolute deadline so write/flush time doesn't accumulate as drift
+            deadline += frame
+            delay = deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+    out.write((RESET if color else "") + end)
+    out.flush()
 
 def bar_task(label: str, steps: int = 8, step_delay: float = 0.6):
     sys.stdout.write(f"{GREEN}{label}{RESET}\r")
     sys.stdout.flush()
-    time.sleep(step_delay)
+    _pause(step_delay)
     sys.stdout.write(f"{GREEN}{label} [........]{RESET}\r")
     sys.stdout.flush()
-    time.sleep(step_delay)
+    _pause(step_delay)
     for i in range(steps):
         filled = "X" * (i + 1)
         rest = "." * (8 - (i + 1))
         sys.stdout.write(f"{GREEN}{label} [{filled}{rest}]{RESET}\r")
         sys.stdout.flush()
-        time.sleep(step_delay)
+        _pause(step_delay)
     sys.stdout.write(f"{GREEN}{label} [XXXXXXXX]{RESET}\r")
     sys.stdout.flush()
-    time.sleep(2)
+    _pause(2)
     sys.stdout.write(f"{GREEN}{label} Complete     {RESET}\n")
     sys.stdout.flush()
 
@@ -131,23 +209,23 @@ def fake_progress(task, seconds=2.5):
     sys.stdout.write(f"{GREEN}{task}: [")
     sys.stdout.flush()
     for _ in range(steps):
-        time.sleep(delay)
+        _pause(delay)
         sys.stdout.write("#")
         sys.stdout.flush()
     sys.stdout.write(f"] done{RESET}\n")
 
 # === BIOS-STYLE BOOT (ported from your bash script’s “boot” function) ===
-def bios_boot_sequence():
+def bios_boot_sequence(profile="full"):
     type_out("Initializing BIOS", cps=80)
-    time.sleep(0.4)
+    _pause(0.4)
     type_out("WARNING: BIOS DOES NOT MATCH CALLISTO II BIOS HASH", cps=80)
-    time.sleep(0.6)
+    _pause(0.6)
     type_out("CONTINUE BOOT AT OWN RISK", cps=80)
-    time.sleep(0.6)
+    _pause(0.6)
     type_out("USE OF NON STANDARD BIOS VIOLATES SOFTWARE AGREEMENT", cps=80)
-    time.sleep(0.6)
+    _pause(0.6)
     type_out("SOLAR HARDWARE NOT RESPONSIBLE FOR DAMAGE OR DEATH", cps=80)
-    time.sleep(0.8)
+    _pause(0.8)
 
     glitch_lines = [
         r"\e[4AW#RNING: BI@S DOES NOT MATCH C@LL1STO II BOIS HASH",
@@ -167,160 +245,326 @@ def bios_boot_sequence():
         "****************************************************************",
         "****************************************************************",
     ]
-    for line in glitch_lines:
+    # Abbreviated boot skips the corruption effect entirely
+    for line in (glitch_lines if profile == "full" else []):
         type_out(line, cps=80)
-        time.sleep(0.4 if "BIOS SECURITY" not in line and "*" not in line else 0.8)
+        _pause(0.4 if "BIOS SECURITY" not in line and "*" not in line else 0.8)
 
     os.system("cls" if os.name == "nt" else "clear")
     for dots in ["Initializing boot.", "Initializing boot..", "Initializing boot..."]:
         sys.stdout.write(f"{GREEN}{dots}{RESET}\r")
         sys.stdout.flush()
-        time.sleep(0.4)
+        _pause(0.4)
     sys.stdout.write(" " * 60 + "\r")
     sys.stdout.flush()
 
     type_out("Version Detect", cps=80)
-    time.sleep(0.4)
+    _pause(0.4)
     type_out("Drake Industries DRAKOS 4.1 beta...", cps=80)
-    time.sleep(0.4)
+    _pause(0.4)
     type_out("Hardware Detect", cps=80)
-    time.sleep(0.6)
+    _pause(0.6)
     type_out("Solar Hardware Callisto II", cps=80)
-    time.sleep(0.4)
+    _pause(0.4)
 
-    bar_task("MEMTEST", steps=8, step_delay=0.6)
+    if profile == "full":
+        bar_task("MEMTEST", steps=8, step_delay=0.6)
     type_out("64K RAM detected", cps=80)
-    time.sleep(1.2)
+    _pause(1.2)
 
     os.system("cls" if os.name == "nt" else "clear")
     print(f"{YELLOW}{LOGO_ASCII}{RESET}")
-    time.sleep(3)
+    _pause(3)
 
 # === WEBDIS HELPERS ===
-def safe_get(url):
-    """HTTP GET with graceful failure; returns text or None."""
-    if requests:
-        try:
-            r = requests.get(url, timeout=TIMEOUT)
-            r.raise_for_status()
-            return r.text
-        except Exception:
-            return None
-    else:
-        try:
-            with request.urlopen(url, timeout=TIMEOUT) as resp:
-                return resp.read().decode("utf-8")
-        except Exception:
-            return None
+_client = connect(WEBDIS_BASE, REDIS_URL, TIMEOUT, batch=MGET_BATCH,
+                  health=WebdisHealth(HEALTH_DOWN_TTL, HEALTH_BACKOFF_MAX))
 
-def webdis_get(key):
-    """GET key via Webdis; returns parsed JSON dict or None if unreachable."""
-    u = WEBDIS_BASE.rstrip("/") + f"/GET/{parse.quote(key, safe='')}.json"
-    raw = safe_get(u)
-    if raw is None:
-        return None
-    try:
-        return json.loads(raw)
-    except Exception:
-        return None
+def _scalar(v):
+    """Terminal convention for values: lowercase string, 'nil' when missing."""
+    return v.lower() if v is not None else "nil"
 
-def webdis_set(key, value):
-    """SET key via Webdis; returns parsed JSON dict or None if unreachable."""
-    u = WEBDIS_BASE.rstrip("/") + f"/SET/{parse.quote(key, safe='')}/{parse.quote(str(value), safe='')}.json"
-    raw = safe_get(u)
-    if raw is None:
-        return None
-    try:
-        return json.loads(raw)
-    except Exception:
+def webdis_mget(keys):
+    """MGET keys in as few requests as possible; lowercase scalars aligned with keys, or None if unreachable."""
+    vals = _client.mget(keys)
+    if vals is None:
         return None
+    return [_scalar(v) for v in vals]
 
-def _extract_scalar(v):
-    """Normalize scalars to lowercase strings."""
-    if isinstance(v, bool):
-        return "1" if v else "0"
-    if isinstance(v, (int, float)):
-        return str(v).lower()
-    if isinstance(v, str):
-        return v.strip().lower()
-    return None
+# === KEY-SHAPE DISCOVERY ===
+# Maps canonical "Room:state" -> the concrete Webdis key shape that last held a value,
+# so later lookups only ask for the one key that actually exists.
+_key_shape_cache = {}
 
-def _val_from_webdis_get(payload):
+# Deployment-wide naming convention (index into _flag_candidates), learned by one KEYS scan.
+_key_convention = {"shape": None, "expires": 0.0}
+
+def _flag_candidates(room, state):
+    """Key shapes a room flag may be stored under, in lookup precedence order."""
+    colon, under = f"{room}:{state}", f"{room}_{state}"
+    return [colon, colon.lower(), under, under.lower()]
+
+def discover_key_shapes(force=False):
     """
-    Handle Webdis GET variants:
-      {"GET":["OK","1"]}, {"GET":["1"]}, {"GET":"1"}, {"GET":[1]}, {"GET":[true]}
-    Returns a lowercase string scalar or 'nil'.
+    Learn which flag key shape this deployment uses with a single KEYS call.
+    Seeds _key_shape_cache for every flag that exists and caches the dominant shape
+    for KEY_SHAPE_TTL seconds. Returns the shape index, or None if unknown/unreachable.
     """
-    if payload is None or not isinstance(payload, dict) or "GET" not in payload:
-        return "nil"
-    data = payload["GET"]
-    if isinstance(data, list):
-        for item in reversed(data):
-            s = _extract_scalar(item)
-            if s and s != "ok":
-                return s
-        return "nil"
-    s = _extract_scalar(data)
-    return s if s is not None else "nil"
-
-def _truthy(x):
-    return str(x).strip().lower() in ("1", "true", "on", "yes")
-
-def _read_flag_by_patterns(base_key):
+    now = time.monotonic()
+    if not force and _key_convention["expires"] > now:
+        return _key_convention["shape"]
+
+    found = _client.keys("*[Rr]oom[:_]*")
+    if found is None:
+        return None
+
+    existing = set(found)
+    counts = [0, 0, 0, 0]
+    for room in ROOMS:
+        for state in ROOM_STATES:
+            for i, k in enumerate(_flag_candidates(room, state)):
+                if k in existing:
+                    _key_shape_cache[f"{room}:{state}"] = k
+                    counts[i] += 1
+                    break
+
+    shape = counts.index(max(counts)) if max(counts) else None
+    _key_convention.update(shape=shape, expires=now + KEY_SHAPE_TTL)
+    return shape
+
+def _known_convention():
+    """Return the cached convention without triggering a scan."""
+    if _key_convention["expires"] > time.monotonic():
+        return _key_convention["shape"]
+    return None
+
+# === STATUS SNAPSHOT (batched MGET) ===
+def status_snapshot(states=("fire", "breach")):
     """
-    Try common key shapes for a single boolean flag.
-    base_key: e.g., 'Command_Deck_Room:fire' or 'Command_Deck_Room_fire' (we construct both).
-    Returns tuple (found, is_true).
+    Resolve every room flag and layer key with one MGET (plus one more for stale cached shapes).
+    While the key convention is unknown every candidate shape is asked for; if a flag then
+    misses, one KEYS scan learns the convention so later snapshots ask for one key per flag.
+    Returns {"rooms": {(room, state): bool}, "layers": {layer: bool}} or None if Webdis is unreachable.
     """
-    candidates = [base_key, base_key.lower()]
-    if ":" in base_key:
-        room, state = base_key.split(":", 1)
-        candidates += [f"{room}_{state}", f"{room}_{state}".lower()]
-    else:
-        if "_" in base_key:
-            room, state = base_key.rsplit("_", 1)
-            candidates += [f"{room}:{state}", f"{room}:{state}".lower()]
+    flags = [(room, state) for room in ROOMS for state in states]
+    shape = _known_convention()
+
+    # First pass: cached or conventional shape where known, otherwise every candidate shape
+    keys = list(LAYER_KEYS)
+    spans = {}
+    for flag in flags:
+        cached = _key_shape_cache.get(f"{flag[0]}:{flag[1]}")
+        if cached:
+            cands = [cached]
+        elif shape is not None:
+            cands = [_flag_candidates(*flag)[shape]]
+        else:
+            cands = _flag_candidates(*flag)
+        spans[flag] = (len(keys), cands, bool(cached))
+        keys += cands
 
-    for k in candidates:
-        payload = webdis_get(k)
-        if payload is None:
-            continue
-        val = _val_from_webdis_get(payload)
-        if val != "nil":
-            return True, _truthy(val)
-    return False, False
-
-def _room_state(room, state):
-    found, truth = _read_flag_by_patterns(f"{room}:{state}")
-    if found:
-        return truth
-    _, truth = _read_flag_by_patterns(f"{room}_{state}")
-    return truth
-
-def _get_any_truthy(*keys):
-    for k in keys:
-        v = _val_from_webdis_get(webdis_get(k))
-        if _truthy(v):
-            return True
-    return False
-
-def _get_float(key):
-    """Fetch a Webdis key and parse it as float; return (ok, value) where ok=False if not present/unparseable."""
-    payload = webdis_get(key)
-    if payload is None:
-        return False, None
-    val = _val_from_webdis_get(payload)
-    if val == "nil":
+    vals = webdis_mget(keys)
+    if vals is None:
+        return None
+
+    layers = {lk: truthy(v) for lk, v in zip(LAYER_KEYS, vals)}
+    rooms = {}
+    stale = []
+    missed = False
+    for flag, (start, cands, from_cache) in spans.items():
+        for k, v in zip(cands, vals[start:start + len(cands)]):
+            if v != "nil":
+                _key_shape_cache[f"{flag[0]}:{flag[1]}"] = k
+                rooms[flag] = truthy(v)
+                break
+        else:
+            if from_cache:
+                # Cached shape vanished; forget it and re-probe every shape below
+                _key_shape_cache.pop(f"{flag[0]}:{flag[1]}", None)
+                stale.append(flag)
+            else:
+                rooms[flag] = False
+                missed = True
+
+    if missed and shape is None:
+        # Caches the convention (or that there is none) for KEY_SHAPE_TTL, so this scans at most once per TTL
+        discover_key_shapes()
+
+    if stale:
+        keys = [k for flag in stale for k in _flag_candidates(*flag)]
+        vals = webdis_mget(keys)
+        if vals is None:
+            return None
+        for n, flag in enumerate(stale):
+            rooms[flag] = False
+            for k, v in zip(_flag_candidates(*flag), vals[n * 4:n * 4 + 4]):
+                if v != "nil":
+                    _key_shape_cache[f"{flag[0]}:{flag[1]}"] = k
+                    rooms[flag] = truthy(v)
+                    break
+
+    return {"rooms": rooms, "layers": layers}
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d*)?|-?\.\d+")
+
+def _parse_float(val):
+    """Parse a Webdis scalar as float; return (ok, value) where ok=False if missing/unparseable."""
+    if val is None or val == "nil":
         return False, None
     try:
         return True, float(val)
-    except Exception:
-        # Try stripping non-numeric cruft just in case
-        try:
-            cleaned = "".join(ch for ch in val if (ch.isdigit() or ch in ".-"))
-            return True, float(cleaned)
-        except Exception:
+    except ValueError:
+        # Tolerate units or thousands separators, e.g. "1,250.5 kg"
+        m = _NUMBER.search(val.replace(",", ""))
+        if m is None:
             return False, None
+        return True, float(m.group())
+
+# === STORAGE TELEMETRY ===
+# Recent (monotonic time, kg) samples per storage key, fed by every real read (live or mirror resync).
+_storage_history = {k: deque(maxlen=STORAGE_HISTORY) for k in STORAGE_KEYS}
+
+def record_storage(readings, at=None):
+    """Append one sample per key from (ok, value) readings aligned with STORAGE_KEYS."""
+    at = time.monotonic() if at is None else at
+    for key, (ok, val) in zip(STORAGE_KEYS, readings):
+        if ok and val is not None:
+            _storage_history[key].append((at, val))
+
+def storage_trend(key):
+    """
+    Consumption rate for key in kg/s (positive = draining) from its sample window,
+    or None until the window spans at least STORAGE_MIN_SPAN seconds.
+    """
+    hist = _storage_history.get(key)
+    if not hist or len(hist) < 2:
+        return None
+    (t0, v0), (t1, v1) = hist[0], hist[-1]
+    if t1 - t0 < STORAGE_MIN_SPAN:
+        return None
+    return (v0 - v1) / (t1 - t0)
+
+def _fmt_duration(seconds):
+    seconds = int(seconds)
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h}h{m:02d}m" if h else f"{m}m{s:02d}s"
+
+# === STATE MIRROR (optional, fed by Webdis pub/sub) ===
+def _room_flags(room, state):
+    """Resolved room state ('fire', 'inferno', 'nil'...) -> {(room, state): bool} for every ROOM_STATES entry."""
+    on = set(ROOM_STATE_FLAGS.get(state, (state,)))
+    return {(room, st): st in on for st in ROOM_STATES}
+
+class StateMirror:
+    """
+    In-memory copy of room, layer, phase, storage and beacon keys.
+    A subscriber thread applies messages from the AppDaemon bridge's channels as they
+    arrive, and a resync thread re-reads everything every MIRROR_RESYNC_SEC. While the
+    last resync is younger than MIRROR_MAX_AGE, status and storage answer from memory.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.rooms = {}       # (room, state) -> bool
+        self.layers = {}      # layer key -> bool
+        self.values = {}      # phase/storage/beacon key -> lowercase scalar ('nil' when missing)
+        self.synced_at = 0.0  # monotonic time of the last successful full resync
+
+    def start(self):
+        for target in (self._subscribe_loop, self._resync_loop):
+            threading.Thread(target=target, daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def fresh(self):
+        return self.synced_at > 0 and time.monotonic() - self.synced_at < MIRROR_MAX_AGE
+
+    # ---- reads ----
+    def status(self):
+        """Same shape as status_snapshot(), or None if the mirror is stale."""
+        if not self.fresh():
+            return None
+        with self._lock:
+            return {"rooms": dict(self.rooms), "layers": dict(self.layers)}
+
+    def get_many(self, keys):
+        """Scalars aligned with keys, or None if the mirror is stale."""
+        if not self.fresh():
+            return None
+        with self._lock:
+            return [self.values.get(k, "nil") for k in keys]
+
+    # ---- full resync ----
+    def resync(self):
+        """Re-read the same keys the channels mirror (room state keys, layers, values) in one MGET."""
+        room_keys = [ROOM_KEY_PREFIX + room for room in ROOMS]
+        keys = PHASE_KEYS + STORAGE_KEYS + BEACON_KEYS
+        vals = webdis_mget(room_keys + LAYER_KEYS + keys)
+        if vals is None:
+            return False
+        room_vals = vals[:len(ROOMS)]
+        layer_vals = vals[len(ROOMS):len(ROOMS) + len(LAYER_KEYS)]
+        vals = vals[len(ROOMS) + len(LAYER_KEYS):]
+        rooms = {}
+        for room, state in zip(ROOMS, room_vals):
+            rooms.update(_room_flags(room, state))
+        with self._lock:
+            self.rooms = rooms
+            self.layers = {lk: truthy(v) for lk, v in zip(LAYER_KEYS, layer_vals)}
+            self.values.update(zip(keys, vals))
+            self.synced_at = time.monotonic()
+        record_storage([_parse_float(v) for v in vals[len(PHASE_KEYS):len(PHASE_KEYS) + len(STORAGE_KEYS)]])
+        return True
+
+    def _resync_loop(self):
+        while not self._stop.is_set():
+            self.resync()
+            self._stop.wait(MIRROR_RESYNC_SEC)
+
+    # ---- pub/sub ----
+    def apply(self, channel, message):
+        """Apply one 'Key:value' (or comma-joined 'K1:v1,K2:v2') message published by the AppDaemon bridge."""
+        if not isinstance(message, str):
+            return
+        with self._lock:
+            for pair in message.split(","):
+                if ":" not in pair:
+                    continue
+                key, val = pair.rsplit(":", 1)
+                key, val = key.strip(), val.strip().lower()
+                if channel == ROOM_PUB_CHANNEL:
+                    # Room messages carry the resolved state; fan it out to the per-state flags
+                    self.rooms.update(_room_flags(key, val))
+                elif channel == LAYER_PUB_CHANNEL:
+                    self.layers[key] = truthy(val)
+                else:
+                    self.values[key] = val
+
+    def _subscribe_loop(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                if self._stream():
+                    backoff = 1.0
+            except Exception:
+                pass
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    def _stream(self):
+        """Hold one Webdis SUBSCRIBE stream open and apply messages until it ends."""
+        channels = [c for c in (ROOM_PUB_CHANNEL, PHASE_PUB_CHANNEL, LAYER_PUB_CHANNEL) if c]
+        # Quiet channels are normal; reconnect after a long silence to catch dead sockets
+        for channel, message in _client.subscribe(channels, idle_timeout=MIRROR_STREAM_IDLE):
+            if self._stop.is_set():
+                break
+            self.apply(channel, message)
+        return True
+
+_mirror = StateMirror()
 
 # === UI: help and status ===
 def print_help():
@@ -338,27 +582,33 @@ def print_help():
     print(f"{GREEN}help{RESET}              - Display this message")
     print(f"{GREEN}exit{RESET}              - Attempt to exit (disabled)\n")
 
+def fetch_status():
+    """Room/layer snapshot from the mirror when fresh, else one batched read; None if unreachable."""
+    snap = _mirror.status()
+    if snap is None:
+        # One batched read for every room flag and layer key (fails fast if Webdis is known down)
+        snap = status_snapshot()
+    return snap
+
 def print_status():
+    render_status(fetch_status())
+
+def render_status(snap):
     warnings = []
 
-    # Sensor/Webdis availability
-    if safe_get(WEBDIS_BASE.rstrip('/') + "/PING") is None:
+    if snap is None:
         print(f"{GREEN}{SENSOR_ERROR_MSG}{RESET}")
         return
 
     # Per-room warnings (fire/breach only)
     for room in ROOMS:
-        if _room_state(room, "fire"):
+        if snap["rooms"].get((room, "fire")):
             warnings.append(f"WARNING: FIRE detected in {room.replace('_', ' ')}.")
-        if _room_state(room, "breach"):
+        if snap["rooms"].get((room, "breach")):
             warnings.append(f"WARNING: HULL BREACH detected in {room.replace('_', ' ')}.")
 
     # Layer detection: prefer deepest active by list order
-    active_layers = []
-    for lk in LAYER_KEYS:
-        v = _val_from_webdis_get(webdis_get(lk))
-        if _truthy(v):
-            active_layers.append(lk)
+    active_layers = [lk for lk in LAYER_KEYS if snap["layers"].get(lk)]
     layer = active_layers[-1] if active_layers else "<UNKNOWN LAYER>"
 
     # Global warnings
@@ -374,21 +624,46 @@ def print_status():
         print(f"{GREEN}{w}{RESET}")
 
 # === STORAGE QUERY ===
+def fetch_storage():
+    """(ok, value) per STORAGE_KEYS entry, from the mirror when fresh; None if Webdis is down."""
+    mirrored = _mirror.get_many(STORAGE_KEYS)
+    if mirrored is not None:
+        # Already sampled into the history by the mirror's resync
+        return [_parse_float(v) for v in mirrored]
+    # All six keys in one read
+    vals = webdis_mget(STORAGE_KEYS)
+    if vals is None:
+        return None
+    readings = [_parse_float(v) for v in vals]
+    record_storage(readings)
+    return readings
+
 def print_storage():
-    # Sensor/Webdis availability
-    if safe_get(WEBDIS_BASE.rstrip('/') + "/PING") is None:
+    render_storage(fetch_storage())
+
+def render_storage(readings):
+    if readings is None:
         print(f"{GREEN}{SENSOR_ERROR_MSG}{RESET}")
         return
 
     print(f"{GREEN}--- STORAGE LEVELS (kg) ---{RESET}")
     low_warnings = []
-    for key in STORAGE_KEYS:
-        ok, val = _get_float(key)
+    for key, (ok, val) in zip(STORAGE_KEYS, readings):
         label = key.split(":")[-1]
         if not ok or val is None:
             print(f"{GREEN}{label:16} : N/A{RESET}")
             continue
-        print(f"{GREEN}{label:16} : {val:,.2f}{RESET}")
+
+        trend = ""
+        rate = storage_trend(key)
+        if rate is not None:
+            trend = f"  {-rate * 60:+,.2f} kg/min"
+            if rate > 0 and val >= LOW_STORAGE_THRESHOLD:
+                eta = (val - LOW_STORAGE_THRESHOLD) / rate
+                trend += f"  LOW IN {_fmt_duration(eta)}"
+                if eta < STORAGE_WARN_HORIZON:
+                    low_warnings.append(f"WARNING: {label} will reach LOW CAPACITY in {_fmt_duration(eta)}")
+        print(f"{GREEN}{label:16} : {val:>12,.2f}{trend}{RESET}")
         if val < LOW_STORAGE_THRESHOLD:
             low_warnings.append(f"WARNING: LOW CAPACITY for {label} ({val:,.2f} kg)")
 
@@ -405,36 +680,51 @@ LOCKMART_BOILERPLATE = (
     "Would you like to enable the Distress Beacon?"
 )
 
-def handle_distress_beacon():
-    if safe_get(WEBDIS_BASE.rstrip('/') + "/PING") is None:
+BEACON_PROMPT = f"{GREEN}Enable Distress Beacon? (y/N): {RESET}"
+
+def _beacon_precheck(vals):
+    """Report beacon states that need no prompt; True when the user should be asked to enable it."""
+    if vals is None:
         print(f"{GREEN}{SENSOR_ERROR_MSG}{RESET}")
-        return
+        return False
 
-    available = _truthy(_val_from_webdis_get(webdis_get("distress_beacon_available")))
-    already_on = _get_any_truthy("distress_beacon_on", "distress_beacon")
+    available = truthy(vals[0])
+    already_on = any(truthy(v) for v in vals[1:])
 
     if not available and not already_on:
         print(f"{GREEN}{SYSTEM_ERROR_MSG}{RESET}")
-        return
+        return False
 
     if already_on:
         print(f"{GREEN}[OK] Distress Beacon is already enabled.{RESET}")
-        return
+        return False
 
     print(f"{GREEN}{LOCKMART_BOILERPLATE}{RESET}")
-    ans = input(f"{GREEN}Enable Distress Beacon? (y/N): {RESET}").strip().lower()
-    if ans not in ("y", "yes"):
+    return True
+
+def _beacon_answer(ans):
+    if ans.strip().lower() not in ("y", "yes"):
         print(f"{GREEN}Operation cancelled.{RESET}")
-        return
+        return False
+    return True
 
-    res = webdis_set("distress_beacon_on", 1)
-    if res is None:
+def _beacon_report(ok):
+    if not ok:
         print(f"{GREEN}{SENSOR_ERROR_MSG}{RESET}")
         return
-
     print(f"{GREEN}[OK] Distress Beacon enabled.{RESET}")
 
+def handle_distress_beacon():
+    # Availability and both "on" spellings in one read
+    if not _beacon_precheck(webdis_mget(BEACON_KEYS)):
+        return
+    if not _beacon_answer(input(BEACON_PROMPT)):
+        return
+    _beacon_report(_client.set("distress_beacon_on", 1))
+
 # === REPL ===
+STORAGE_COMMANDS = ("storage", "query_storage", "query storage")
+
 def repl():
     while True:
         try:
@@ -442,35 +732,155 @@ def repl():
         except (KeyboardInterrupt, EOFError):
             print(f"\n{GREEN}Exit disabled.{RESET}")
             continue
+        run_command(cmd)
+
+def run_command(cmd):
+    if cmd == "help":
+        print_help()
+    elif cmd == "status":
+        print_status()
+    elif cmd in STORAGE_COMMANDS:
+        print_storage()
+    elif cmd == "nav_lights":
+        print(f"{GREEN}{SYSTEM_ERROR_MSG}{RESET}")
+    elif cmd == "distress_beacon":
+        handle_distress_beacon()
+    elif cmd == "exit":
+        print(f"{GREEN}Exit disabled.{RESET}")
+    else:
+        print(f"{GREEN}Unknown command. Type 'help'.{RESET}")
 
-        if cmd == "help":
-            print_help()
-        elif cmd == "status":
-            print_status()
-        elif cmd in ("storage", "query_storage", "query storage"):
-            print_storage()
-        elif cmd == "nav_lights":
-            print(f"{GREEN}{SYSTEM_ERROR_MSG}{RESET}")
-        elif cmd == "distress_beacon":
-            handle_distress_beacon()
-        elif cmd == "exit":
-            print(f"{GREEN}Exit disabled.{RESET}")
+# === ASYNC REPL (optional) ===
+class _StdinLines:
+    """Cancellable line reader on stdin: an event-loop reader on POSIX, a worker thread elsewhere."""
+
+    def __init__(self, loop):
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._buf = b""
+        self._fd = sys.stdin.fileno()
+        try:
+            loop.add_reader(self._fd, self._on_readable)
+            self._threaded = False
+        except (NotImplementedError, ValueError, OSError):
+            self._threaded = True
+
+    def _on_readable(self):
+        chunk = os.read(self._fd, 4096)
+        if not chunk:
+            self._loop.remove_reader(self._fd)
+            self._queue.put_nowait(None)
+            return
+        self._buf += chunk
+        while b"\n" in self._buf:
+            line, self._buf = self._buf.split(b"\n", 1)
+            self._queue.put_nowait(line.decode("utf-8", "replace"))
+
+    async def readline(self, prompt=""):
+        """Next line without its newline, or None at EOF."""
+        sys.stdout.write(prompt)
+        sys.stdout.flush()
+        if self._threaded:
+            line = await self._loop.run_in_executor(None, sys.stdin.readline)
+            return line.rstrip("\n") if line else None
+        return await self._queue.get()
+
+SPINNER = "|/-\\"
+
+async def _querying(fn, *args):
+    """Run a blocking fetch off the event loop, showing a live indicator while it is in flight."""
+    task = asyncio.ensure_future(asyncio.to_thread(fn, *args))
+    spins = 0
+    try:
+        await asyncio.wait({task}, timeout=QUERY_INDICATOR_DELAY)
+        while not task.done():
+            sys.stdout.write(f"\r{GREEN}querying… {SPINNER[spins % len(SPINNER)]}{RESET}")
+            sys.stdout.flush()
+            spins += 1
+            await asyncio.wait({task}, timeout=0.1)
+        return task.result()
+    finally:
+        if spins:
+            sys.stdout.write("\r" + " " * 16 + "\r")
+            sys.stdout.flush()
+        # A cancelled query's worker thread finishes in the background; its result is discarded
+        task.cancel()
+
+async def _run_command_async(cmd, lines):
+    if cmd == "status":
+        render_status(await _querying(fetch_status))
+    elif cmd in STORAGE_COMMANDS:
+        render_storage(await _querying(fetch_storage))
+    elif cmd == "distress_beacon":
+        if not _beacon_precheck(await _querying(webdis_mget, BEACON_KEYS)):
+            return
+        if not _beacon_answer(await lines.readline(BEACON_PROMPT) or ""):
+            return
+        _beacon_report(await _querying(_client.set, "distress_beacon_on", 1))
+    else:
+        # Remaining commands never touch Webdis
+        run_command(cmd)
+
+async def arepl():
+    """
+    REPL that keeps the console responsive while Webdis is slow: queries run in worker
+    threads behind a 'querying…' indicator, and Ctrl-C cancels the query in flight
+    (at the prompt it is still ignored, as in repl()).
+    """
+    loop = asyncio.get_running_loop()
+    lines = _StdinLines(loop)
+    current = {"task": None}
+
+    def on_sigint():
+        task = current["task"]
+        if task is not None and not task.done():
+            task.cancel()
         else:
-            print(f"{GREEN}Unknown command. Type 'help'.{RESET}")
+            print(f"\n{GREEN}[system] Signal {int(signal.SIGINT)} ignored. Corporate policy forbids termination.{RESET}")
+
+    try:
+        loop.add_signal_handler(signal.SIGINT, on_sigint)
+    except (NotImplementedError, RuntimeError):
+        pass
+
+    while True:
+        line = await lines.readline(f"{GREEN}WY>{RESET} ")
+        if line is None:
+            print(f"\n{GREEN}Exit disabled.{RESET}")
+            await asyncio.sleep(1)
+            continue
+        current["task"] = asyncio.ensure_future(_run_command_async(line.strip(), lines))
+        try:
+            await current["task"]
+        except asyncio.CancelledError:
+            print(f"\n{GREEN}[system] Query cancelled.{RESET}")
+        finally:
+            current["task"] = None
 
 # === MAIN ===
 def main():
     disable_exit()
     ignore_signals()
 
-    # BIOS-like boot sequence adapted from your bash script
-    bios_boot_sequence()
+    # Warm the state mirror while the boot sequence plays
+    if STATE_MIRROR:
+        _mirror.start()
+
+    # BIOS-like boot sequence adapted from your bash script; skipped when resuming after a restart
+    profile = select_boot_profile()
+    if profile == "short":
+        _pace["scale"] = BOOT_SHORT_SCALE
+    if profile != "instant":
+        bios_boot_sequence(profile)
+
+        # Recovery banner
+        print(f"{GREEN}Weyland-Yutani Corporation — Proprietary Systems Loader{RESET}\n")
+        fake_progress("Authenticating corporate seals", 2.0)
+        fake_progress("Mounting restricted volumes", 1.6)
+        fake_progress("Decrypting mission data", 1.4)
+    _pace["scale"] = 1.0
+    mark_booted()
 
-    # Recovery banner
-    print(f"{GREEN}Weyland-Yutani Corporation — Proprietary Systems Loader{RESET}\n")
-    fake_progress("Authenticating corporate seals", 2.0)
-    fake_progress("Mounting restricted volumes", 1.6)
-    fake_progress("Decrypting mission data", 1.4)
     print(
         f"\n{GREEN}"
         "SYSTEMS RECOVERY TERMINAL v3.4\n"
@@ -481,7 +891,10 @@ def main():
         f"{RESET}\n"
     )
     print(f"{GREEN}Type 'help' for available commands.{RESET}\n")
-    repl()
+    if ASYNC_REPL:
+        asyncio.run(arepl())
+    else:
+        repl()
 
 if __name__ == "__main__":
     main()
@@ -1,21 +1,422 @@
+import os
+import sys
+import json
 import time
-from urllib.parse import quote
+import threading
+from contextlib import contextmanager
 import appdaemon.plugins.hass.hassapi as hass
-import requests
+
+try:
+    from webdislib import connect, truthy
+except ImportError:
+    # Running from a repo checkout instead of an apps dir that holds a copy of webdislib/
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+    from webdislib import connect, truthy
+
+
+class TickStats:
+    """
+    Wall time per tick phase (read_ha, resolve, rooms, phases, flush, layers), plus whole-tick
+    time, overruns (tick longer than the interval it ran under) and skipped ticks.
+    summary() returns the window's figures and starts a new window.
+    """
+
+    PHASES = ("read_ha", "resolve", "rooms", "phases", "flush", "layers")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started = time.monotonic()
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.tick_total = 0.0
+        self.tick_max = 0.0
+        self.total = dict.fromkeys(self.PHASES, 0.0)
+        self.max = dict.fromkeys(self.PHASES, 0.0)
+
+    @contextmanager
+    def phase(self, name):
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            dt = time.monotonic() - t0
+            self.total[name] += dt
+            if dt > self.max[name]:
+                self.max[name] = dt
+
+    def tick(self, elapsed, budget):
+        self.ticks += 1
+        self.tick_total += elapsed
+        self.tick_max = max(self.tick_max, elapsed)
+        if elapsed > budget:
+            self.overruns += 1
+
+    def summary(self):
+        n = self.ticks or 1
+        out = {
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "avg_ms": round(self.tick_total / n * 1000, 1),
+            "max_ms": round(self.tick_max * 1000, 1),
+        }
+        for p in self.PHASES:
+            out[f"{p}_avg_ms"] = round(self.total[p] / n * 1000, 1)
+            out[f"{p}_max_ms"] = round(self.max[p] * 1000, 1)
+        self.reset()
+        return out
+
+
+class EventLog:
+    """
+    Bounded logging for the bridge, so log I/O does not grow with the tick rate:
+      - count(): routine work is only counted; flush() writes the counters as one line
+      - change(): state changes are logged in full, at most `burst` lines per window
+      - error(): logged once per key per window; repeats are only counted
+      - debug(): full per-call detail, only at level "debug"
+    Levels: "quiet" (errors and summaries), "changes" (default), "debug".
+    """
+
+    LEVELS = {"quiet": 0, "changes": 1, "debug": 2}
+
+    def __init__(self, log, level="changes", window=60.0, burst=20):
+        self._log = log
+        self.level = self.LEVELS.get(str(level).lower(), 1)
+        self.window = window
+        self.burst = burst
+        self._lock = threading.Lock()
+        self.counters = {}
+        self._window_start = time.monotonic()
+        self._lines = 0
+        self._held = 0
+        self._errors = {}
+
+    def _roll(self):
+        now = time.monotonic()
+        if now - self._window_start >= self.window:
+            self._window_start = now
+            self._lines = 0
+            self._errors = {}
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def debug(self, msg):
+        if self.level >= 2:
+            self._emit(msg)
+
+    def change(self, msg):
+        if self.level >= 1:
+            self._emit(msg)
+
+    def _emit(self, msg):
+        with self._lock:
+            self._roll()
+            if self._lines >= self.burst:
+                self._held += 1
+                return
+            self._lines += 1
+        self._log(msg)
+
+    def error(self, msg, key=None):
+        key = key or msg
+        with self._lock:
+            self._roll()
+            self.counters["errors"] = self.counters.get("errors", 0) + 1
+            if key in self._errors:
+                self._errors[key] += 1
+                return
+            self._errors[key] = 1
+        self._log(msg, level="WARNING")
+
+    def flush(self):
+        """One line with everything counted since the last flush (nothing if idle)."""
+        with self._lock:
+            counters, self.counters = self.counters, {}
+            held, self._held = self._held, 0
+        if held:
+            counters["held_lines"] = held
+        if counters:
+            self._log("[stats] " + " ".join(f"{k}={v}" for k, v in sorted(counters.items())))
+
+
+class WriteQueue:
+    """
+    Outbound Webdis writes that survive an outage. Keys coalesce (latest value wins) and so
+    do the Key:value pairs queued per pub/sub channel, so an outage costs one entry per key
+    rather than one per tick. A flush sends everything pending as one pipeline (MSET plus
+    one comma-joined PUBLISH per channel); on failure it all stays queued and the next
+    attempt waits retry_min, doubling up to retry_max, unless forced. Past max_keys the
+    oldest key is dropped and counted in `dropped`.
+
+    flush() is begin() -> pipeline(...).execute() -> settle(); the async app awaits the middle.
+    """
+
+    def __init__(self, client, max_keys=1024, retry_min=1.0, retry_max=10.0):
+        self.client = client
+        self.max_keys = max_keys
+        self.retry_min = retry_min
+        self.retry_max = retry_max
+        self._lock = threading.Lock()
+        self.sets = {}       # key -> value, oldest first
+        self.pubs = {}       # channel -> {pair key: value}
+        self.dropped = 0
+        self.failures = 0
+        self.retry_at = 0.0
+
+    def __len__(self):
+        return len(self.sets) + sum(len(p) for p in self.pubs.values())
+
+    def set(self, key, value):
+        with self._lock:
+            self.sets.pop(key, None)
+            self.sets[key] = value
+            if len(self.sets) > self.max_keys:
+                del self.sets[next(iter(self.sets))]
+                self.dropped += 1
+
+    def publish(self, channel, pairs):
+        with self._lock:
+            self.pubs.setdefault(channel, {}).update(pairs)
+
+    def begin(self, force=False):
+        """Snapshot (sets, pubs) to send, or None if nothing is pending or the retry wait is running."""
+        with self._lock:
+            if not self.sets and not self.pubs:
+                return None
+            if not force and time.monotonic() < self.retry_at:
+                return None
+            return dict(self.sets), {ch: dict(pairs) for ch, pairs in self.pubs.items()}
+
+    def pipeline(self, sets, pubs):
+        pipe = self.client.pipeline(transaction=True)
+        for key, value in sets.items():
+            pipe.set(key, value)
+        for channel, pairs in pubs.items():
+            pipe.publish(channel, ",".join(f"{k}:{v}" for k, v in pairs.items()))
+        return pipe
+
+    def settle(self, sets, pubs, results):
+        """Drop what was delivered (unless re-queued meanwhile); True if the whole batch went out."""
+        ok = all(results[:len(sets)])
+        pub_ok = results[len(sets):] if ok else [False] * len(pubs)
+        with self._lock:
+            if ok:
+                for key, value in sets.items():
+                    if self.sets.get(key) == value:
+                        del self.sets[key]
+            for (channel, pairs), sent in zip(pubs.items(), pub_ok):
+                pending = self.pubs.get(channel)
+                if not sent or pending is None:
+                    continue
+                for k, v in pairs.items():
+                    if pending.get(k) == v:
+                        del pending[k]
+                if not pending:
+                    del self.pubs[channel]
+            ok = ok and all(pub_ok)
+            if ok:
+                self.failures = 0
+                self.retry_at = 0.0
+            else:
+                self.failures += 1
+                wait = min(self.retry_max, self.retry_min * 2 ** (self.failures - 1))
+                self.retry_at = time.monotonic() + wait
+        return ok
+
+    def flush(self, force=False):
+        """Send everything pending; None if nothing was sent, else whether it all went out."""
+        batch = self.begin(force)
+        if batch is None:
+            return None
+        return self.settle(*batch, self.pipeline(*batch).execute())
+
+
+MAX_HAZARD_KINDS = 16   # the lookup table holds 2 ** kinds entries
+
+
+def compile_hazard_rules(kinds, rules=None, default="ok"):
+    """
+    Precedence rules -> lookup table indexed by a room's hazard bitmask (bit k = kinds[k] on).
+    Each rule is {"when": [kinds that must be on], "unless": [kinds that must be off],
+    "state": output}; the first matching rule wins, and no match gives default. Without
+    rules, kinds is a plain precedence list (the first kind that is on wins). Rules are
+    evaluated here, once per mask, so adding rules costs nothing per tick.
+    """
+    kinds = list(kinds)
+    if len(kinds) > MAX_HAZARD_KINDS:
+        raise ValueError(f"at most {MAX_HAZARD_KINDS} hazard kinds are supported, got {len(kinds)}")
+    bit = {k: 1 << i for i, k in enumerate(kinds)}
+    if rules is None:
+        rules = [{"when": [k], "state": k} for k in kinds]
+
+    compiled = []
+    for rule in rules:
+        state = str(rule["state"])
+        if "," in state or ":" in state:
+            raise ValueError(f"hazard state {state!r} may not contain ',' or ':' (pub/sub separators)")
+        masks = []
+        for field in ("when", "unless"):
+            names = rule.get(field) or []
+            unknown = [n for n in names if n not in bit]
+            if unknown:
+                raise ValueError(f"hazard rule {rule!r}: unknown kinds {unknown}")
+            masks.append(sum(bit[n] for n in names))
+        compiled.append((masks[0], masks[1], state))
+
+    lookup = []
+    for mask in range(1 << len(kinds)):
+        for when, unless, state in compiled:
+            if mask & when == when and not mask & unless:
+                lookup.append(state)
+                break
+        else:
+            lookup.append(default)
+    return tuple(lookup)
+
+
+class RoomTable:
+    """
+    Room/entity map compiled once into flat index tables. Room r, hazard kind k live in
+    slot r * len(kinds) + k: entities[slot] is the HA entity feeding it (None if unmapped).
+    Each room's hazards are one bitmask (masks[r], bit k = kind k on), and its state is
+    lookup[masks[r]] from compile_hazard_rules, so resolving is one index per room however
+    many kinds and rules there are. masks/states are preallocated and reused every tick.
+    """
+
+    def __init__(self, entity_map, kinds, default="ok", rules=None):
+        self.kinds = tuple(kinds)
+        self.default = default
+        self.lookup = compile_hazard_rules(self.kinds, rules, default)
+        self.rooms = []
+        index = {}
+        pending = []
+        for eid, (room, kind) in entity_map.items():
+            if kind not in self.kinds:
+                raise ValueError(f"{eid}: hazard kind {kind!r} is not one of {list(self.kinds)}")
+            if room not in index:
+                index[room] = len(self.rooms)
+                self.rooms.append(room)
+            pending.append((eid, index[room], self.kinds.index(kind)))
+
+        width = len(self.kinds)
+        self.width = width
+        self.entities = [None] * (len(self.rooms) * width)
+        self.entity_slot = {}     # entity_id -> slot
+        for eid, r, k in pending:
+            self.entities[r * width + k] = eid
+            self.entity_slot[eid] = r * width + k
+        # slot -> (room index, kind bit), so reads never divide
+        self.slot_room = [slot // width for slot in range(len(self.entities))]
+        self.slot_bit = [1 << (slot % width) for slot in range(len(self.entities))]
+        self.masks = [0] * len(self.rooms)
+        self.states = [self.lookup[0]] * len(self.rooms)
+        self.outputs = tuple(dict.fromkeys(self.lookup))   # distinct states, for counts()
+
+    def room_of(self, entity_id):
+        return self.entity_slot[entity_id] // self.width
+
+    def set_flag(self, slot, on):
+        r = self.slot_room[slot]
+        if on:
+            self.masks[r] |= self.slot_bit[slot]
+        else:
+            self.masks[r] &= ~self.slot_bit[slot]
+
+    def resolve(self, r):
+        return self.lookup[self.masks[r]]
+
+    def resolve_all(self):
+        """Refresh states from masks; returns the states list (aligned with rooms)."""
+        states, lookup = self.states, self.lookup
+        for r, mask in enumerate(self.masks):
+            states[r] = lookup[mask]
+        return states
+
+    def counts(self):
+        out = dict.fromkeys(self.outputs, 0)
+        for st in self.states:
+            out[st] += 1
+        return out
+
+
+def load_room_map(args, default_map, default_kinds):
+    """
+    (entity_map, kinds, default_state, rules) from apps.yaml args, falling back to
+    default_map. A room_map_file (YAML or JSON) supplies the same keys as args; args win.
+    rooms maps room_id -> entity stem ("medical" -> input_boolean.medical_<kind>) or
+    {kind: entity_id}; hazard_rules is the rule list for compile_hazard_rules.
+    default_state is the state of a room with no hazard on (and no matching rule), "ok"
+    unless set.
+    """
+    cfg = {}
+    path = args.get("room_map_file")
+    if path:
+        with open(path) as f:
+            if path.endswith(".json"):
+                cfg = json.load(f)
+            else:
+                import yaml  # AppDaemon already depends on PyYAML
+                cfg = yaml.safe_load(f) or {}
+    cfg.update({k: args[k] for k in ("rooms", "hazard_kinds", "hazard_rules", "default_state", "entity_domain") if k in args})
+
+    kinds = list(cfg.get("hazard_kinds") or default_kinds)
+    default_state = cfg.get("default_state", "ok")
+    rules = cfg.get("hazard_rules")
+    rooms = cfg.get("rooms")
+    if not rooms:
+        return dict(default_map), kinds, default_state, rules
+
+    domain = cfg.get("entity_domain", "input_boolean")
+    entity_map = {}
+    for room, spec in rooms.items():
+        if isinstance(spec, str):
+            spec = {kind: f"{domain}.{spec}_{kind}" for kind in kinds}
+        for kind, eid in spec.items():
+            entity_map[eid] = (room, kind)
+    return entity_map, kinds, default_state, rules
 
 
 class RPG2025RoomKeys(hass.Hass):
     """
     Existing:
       - Aggregate room OK/FIRE/BREACH booleans from HA -> write per-room key to Webdis
+        (rooms, hazard_kinds, hazard_rules and default_state come from apps.yaml or
+        room_map_file when set; see compile_hazard_rules)
       - Optional publish to pubsub channel
 
-    New (every tick, unconditional):
-      - HA Phase booleans -> Webdis keys Phase1..Phase4 (strings "true"/"false")
-      - Webdis Layer keys -> HA booleans (CloudDeck/Stratosheath/RedZone/Crushdepth)
+    New (every tick):
+      - HA Phase booleans -> Webdis keys Phase1..Phase4 (strings "true"/"false"), changed
+        phases only, in one MSET plus one comma-joined PUBLISH
+      - Webdis Layer keys -> HA booleans (CloudDeck/Stratosheath/RedZone/Crushdepth), service
+        calls only when a boolean actually needs to change; with layer_subscribe the keys arrive
+        on layer_pub_channel and are MGET-polled only every reconcile_sec
+
+    Event-driven (event_driven: true, the default):
+      - listen_state on every room/phase entity re-resolves only the affected room/phase
+        and writes it immediately
+      - the tick reconciles rooms/phases only every reconcile_sec; layers still poll every tick
+
+    Tick timing:
+      - each tick schedules the next when it finishes, so slow ticks never overlap or queue up
+      - the interval doubles (to max_interval_sec) while ticks are slow, and recovers when fast
+      - per-phase avg/max times are logged every stats_sec, and set on timing_sensor if given
+
+    Outages:
+      - room/phase writes go through a WriteQueue; while Webdis is down they coalesce per key
+        and retry with backoff, and the whole backlog is flushed as soon as Webdis answers
+
+    Logging (log_level, see EventLog):
+      - changes are logged as they happen, at most log_burst lines per stats_sec
+      - routine polls/writes are counted into one [stats] line per stats_sec
+      - repeated errors (e.g. Webdis down) are logged once per stats_sec
     """
 
-    # ---------- Existing room map (unchanged) ----------
+    # ---------- Default room map (used when apps.yaml has no rooms / room_map_file) ----------
     ENTITY_MAP = {
         "input_boolean.commanddeck_ok":     ("Command_Deck_Room", "ok"),
         "input_boolean.commanddeck_fire":   ("Command_Deck_Room", "fire"),
@@ -66,12 +467,36 @@ class RPG2025RoomKeys(hass.Hass):
         "input_boolean.reactor_breach":     ("Reactor_Core_Room", "breach"),
     }
 
+    # Hazard kinds in precedence order: a room shows the first kind that is on
+    HAZARD_KINDS = ["ok", "breach", "fire"]
+
     # Webdis layer keys to *read* and reflect into HA booleans
     LAYER_KEYS = ["CloudDeck", "Stratosheath", "RedZone", "Crushdepth"]
 
     def initialize(self):
-        # Config
+        self._configure()
+        self._webdis = connect(self.webdis_url, self.redis_url, self.timeout, log=self._transport_error)
+        self._queue = WriteQueue(self._webdis, self.queue_max_keys, self.retry_min, self.retry_max)
+        self._stop = threading.Event()
+
+        if self.event_driven:
+            for eid in self._rooms.entity_slot:
+                self.listen_state(self._on_room_entity, eid)
+            for phase_key, entity in self.phase_ha.items():
+                self.listen_state(self._on_phase_entity, entity, phase_key=phase_key)
+
+        if self.layer_subscribe and self.layer_pub_channel:
+            threading.Thread(target=self._layer_subscriber, daemon=True).start()
+
+        self.log(f"[init] Webdis={self.webdis_url} prefix={self.key_prefix} interval={self.interval}s"
+                 f" event_driven={self.event_driven} layer_subscribe={self.layer_subscribe}")
+        # Each tick schedules the next one when it finishes (see _after_tick), so ticks never overlap
+        self.run_in(self._tick, 0)
+
+    def _configure(self):
+        """Read apps.yaml args and reset bookkeeping (shared with RPG2025RoomKeysAsync)."""
         self.webdis_url   = self.args.get("webdis_url", "http://192.168.30.114:7379").rstrip("/")
+        self.redis_url    = self.args.get("redis_url")  # optional direct RESP; Webdis stays the fallback
         self.key_prefix   = self.args.get("key_prefix", "rpg2025_room_")
         self.pub_channel  = self.args.get("pub_channel", "rpg2025_room_updates")
         self.phase_pub_channel = self.args.get("phase_pub_channel", "orbit_phase_updates")
@@ -79,7 +504,28 @@ class RPG2025RoomKeys(hass.Hass):
         self.interval     = int(self.args.get("interval_sec", 2))
         self.timeout      = float(self.args.get("timeout", 4.0))
         self.publish_on_change = bool(self.args.get("publish_on_change", True))
-        self.verbose      = bool(self.args.get("verbose", True))
+        # Event-driven: listen_state pushes room/phase changes immediately and the tick only
+        # reconciles them every reconcile_sec (layers are still polled every interval_sec)
+        self.event_driven = bool(self.args.get("event_driven", True))
+        self.reconcile    = float(self.args.get("reconcile_sec", 30))
+        # Layers: take changes from layer_pub_channel as they are published and MGET-poll
+        # only every reconcile_sec, instead of polling every interval_sec
+        self.layer_subscribe = bool(self.args.get("layer_subscribe", False))
+        # Logging: "quiet" | "changes" | "debug" (see EventLog); the old verbose flag maps onto it
+        self.log_level    = self.args.get("log_level",
+                                          "changes" if self.args.get("verbose", True) else "quiet")
+        self.log_burst    = int(self.args.get("log_burst", 20))
+        # Adaptive interval: a tick slower than slow_ratio * interval doubles the interval (up to
+        # max_interval_sec); fast ticks halve it back toward interval_sec
+        self.max_interval = float(self.args.get("max_interval_sec", max(30, self.interval)))
+        self.slow_ratio   = float(self.args.get("slow_ratio", 0.5))
+        # Outbound writes queue up while Webdis is down and flush in one batch when it is back
+        self.queue_max_keys = int(self.args.get("queue_max_keys", 1024))
+        self.retry_min    = float(self.args.get("retry_min_sec", 1.0))
+        self.retry_max    = float(self.args.get("retry_max_sec", 10.0))
+        # Timing summary every stats_sec (log line, plus timing_sensor state if set)
+        self.stats_sec    = float(self.args.get("stats_sec", 60))
+        self.timing_sensor = self.args.get("timing_sensor")  # e.g. sensor.rpg2025_bridge_timing
 
         # HA entity ids for layer flags (override in apps.yaml if different)
         self.layer_to_ha = {
@@ -97,165 +543,287 @@ class RPG2025RoomKeys(hass.Hass):
             "Phase4": self.args.get("ha_phase4", "input_boolean.phase4"),
         }
 
-        self._sess = requests.Session()
-        self._last = {}  # room_id -> last state string we wrote
-
-        self.log(f"[init] Webdis={self.webdis_url} prefix={self.key_prefix} interval={self.interval}s")
-        self.run_every(self._tick, "now", self.interval)
+        self._last = {}        # room_id -> last state string we wrote
+        self._last_phase = {}  # phase_key -> last "true"/"false" we wrote
+        self._last_layer = {}  # layer key -> last bool we applied to HA
+        self._last_reconcile = 0.0
+        self._cur_interval = float(self.interval)
+        self._tick_lock = threading.Lock()
+        self._stats = TickStats()
+        self._ev = EventLog(self.log, self.log_level, window=self.stats_sec, burst=self.log_burst)
+
+        # Room map compiled into index tables; one entity change re-resolves only its room
+        entity_map, kinds, default_state, rules = load_room_map(self.args, self.ENTITY_MAP, self.HAZARD_KINDS)
+        self._rooms = RoomTable(entity_map, kinds, default_state, rules)
+
+    def terminate(self):
+        self._stop.set()
+
+    def _transport_error(self, msg):
+        # webdislib reports each failed request; one line per window is enough during an outage
+        self._ev.error(msg, key="transport")
+
+    # ---------- Event-driven: one HA entity changed ----------
+    def _on_room_entity(self, entity, attribute, old, new, kwargs):
+        table = self._rooms
+        r = table.room_of(entity)
+        for slot in range(r * table.width, (r + 1) * table.width):
+            eid = table.entities[slot]
+            if eid is not None:
+                table.set_flag(slot, (new if eid == entity else self.get_state(eid)) == "on")
+        state = table.states[r] = table.resolve(r)
+        room_id = table.rooms[r]
+        if self._last.get(room_id) != state:
+            self._write_rooms({room_id: state})
+            self._ev.change(f"[event] {entity}={new!r} -> {room_id}={state}")
+            self._flush()
+
+    def _on_phase_entity(self, entity, attribute, old, new, kwargs):
+        if self._write_phases({kwargs["phase_key"]: "true" if new == "on" else "false"}):
+            self._flush()
 
     # ---------- Periodic tick ----------
     def _tick(self, _kwargs):
-        # 1) Existing: gather HA booleans, resolve per-room, write to Webdis on change
-        raw = {eid: (self.get_state(eid) or "unknown") for eid in self.ENTITY_MAP}
-        rooms = self._resolve_rooms(raw)
-        changed = 0
-        for room_id, state in rooms.items():
-            if self._last.get(room_id) != state:
-                self._write_room(room_id, state)
-                self._last[room_id] = state
-                changed += 1
-
-        # 2) NEW: push HA phase booleans -> Webdis keys (unconditional)
-        self._sync_phases_ha_to_webdis()
-
-        # 3) NEW: read Webdis layer keys -> force HA booleans (unconditional)
-        self._sync_layers_webdis_to_ha()
-
-        if self.verbose:
-            fires   = sum(1 for v in rooms.values() if v == "fire")
-            breaches= sum(1 for v in rooms.values() if v == "breach")
-            self.log(f"[tick] rooms={len(rooms)} changed={changed} fire={fires} breach={breaches}")
-
-    # ---------- Resolve room precedence (unchanged) ----------
-    def _resolve_rooms(self, raw_states):
-        agg = {}
-        for eid, (room, kind) in self.ENTITY_MAP.items():
-            is_on = (raw_states.get(eid) == "on")
-            agg.setdefault(room, {"ok": False, "breach": False, "fire": False})
-            agg[room][kind] = is_on
-
-        out = {}
-        for room, f in agg.items():
-            if f["ok"]:
-                out[room] = "ok"
-            elif f["breach"]:
-                out[room] = "breach"
-            elif f["fire"]:
-                out[room] = "fire"
-            else:
-                out[room] = "ok"
-        return out
-
-    # ---------- Webdis helpers ----------
-    def _webdis_get_json(self, path):
-        url = f"{self.webdis_url}/{path}"
+        if not self._tick_lock.acquire(blocking=False):
+            # Only reachable if AppDaemon runs this app's callbacks on several threads
+            self._stats.skipped += 1
+            return
+        start = time.monotonic()
         try:
-            r = self._sess.get(url, timeout=self.timeout)
-            if r.status_code != 200:
-                self.log(f"[webdis] GET {url} -> HTTP {r.status_code}")
-                return None
-            return r.json()
-        except Exception as e:
-            self.log(f"[webdis] GET {url} failed: {e}")
-            return None
-
-    def _webdis_get_values(self, keys):
-        """Return list aligned with keys using MGET JSON; fallback to individual GETs."""
-        path = "MGET/" + "/".join(quote(k, safe="") for k in keys) + ".json"
-        data = self._webdis_get_json(path)
-        if data and "MGET" in data:
-            vals = data["MGET"]
-            out = []
-            for v in vals:
-                if isinstance(v, dict) and "value" in v:
-                    out.append(str(v["value"]))
-                else:
-                    out.append(None if v is None else str(v))
-            return out
-
-        out = []
-        for k in keys:
-            g = self._webdis_get_json(f"GET/{quote(k, safe='')}.json")
-            if g and "GET" in g:
-                gv = g["GET"]
-                if isinstance(gv, list) and gv:
-                    out.append(str(gv[0]))
-                elif isinstance(gv, dict) and "value" in gv:
-                    out.append(str(gv["value"]))
-                else:
-                    out.append(None)
+            self._run_tick()
+        finally:
+            self._tick_lock.release()
+            delay, summary = self._after_tick(time.monotonic() - start)
+            self.run_in(self._tick, delay)
+            if summary:
+                self._report_timing(summary)
+
+    def _run_tick(self):
+        # In event-driven mode rooms/phases are pushed by listeners; the tick is only a safety net
+        now = time.monotonic()
+        reconcile = not self.event_driven or now - self._last_reconcile >= self.reconcile
+        changed = 0
+        stats = self._stats
+        if reconcile:
+            self._last_reconcile = now
+
+            # 1) Existing: gather HA booleans, resolve per-room, write to Webdis on change
+            with stats.phase("read_ha"):
+                self._read_room_flags()
+            with stats.phase("resolve"):
+                rooms = self._changed_rooms()
+            with stats.phase("rooms"):
+                changed = self._write_rooms(rooms)
+
+            # 2) NEW: push changed HA phase booleans -> Webdis keys
+            with stats.phase("phases"):
+                self._sync_phases_ha_to_webdis()
+
+        # Rooms and phases (plus anything left over from an outage) go out as one pipeline
+        with stats.phase("flush"):
+            self._flush()
+
+        # 3) NEW: read Webdis layer keys -> HA booleans (change-only; subscribed mode polls only to reconcile)
+        if reconcile or not self.layer_subscribe:
+            with stats.phase("layers"):
+                answered = self._sync_layers_webdis_to_ha()
+            if answered and len(self._queue):
+                # Webdis is back: replay the backlog now instead of waiting out the retry backoff
+                with stats.phase("flush"):
+                    self._flush(force=True)
+
+        if reconcile:
+            line = self._tick_line(changed)
+            if changed:
+                self._ev.change(line)
             else:
-                out.append(None)
-        return out
-
-    def _webdis_set(self, key, value):
-        """SET key to value (string), no JSON post body."""
-        url_set = f"{self.webdis_url}/SET/{quote(key, safe='')}/{quote(value, safe='')}"
-        try:
-            r = self._sess.get(url_set, timeout=self.timeout)
-            if self.verbose:
-                self.log(f"[webdis] SET {key}={value} -> HTTP {r.status_code} RESP={r.text[:160]!r}")
-        except Exception as e:
-            self.log(f"[webdis] SET failed for {key}: {e}")
-
-    def _webdis_publish(self, channel, message):
-        url_pub = f"{self.webdis_url}/PUBLISH/{quote(channel, safe='')}/{quote(message, safe='')}"
-        try:
-            r = self._sess.get(url_pub, timeout=self.timeout)
-            if self.verbose:
-                self.log(f"[webdis] PUB {channel} {message!r} -> HTTP {r.status_code} RESP={r.text[:160]!r}")
-        except Exception as e:
-            self.log(f"[webdis] PUB failed for {channel}: {e}")
+                self._ev.debug(line)
+
+    def _after_tick(self, elapsed):
+        """
+        Record the tick and adapt the interval; returns (delay until the next tick, timing
+        summary or None). Slow ticks (Webdis timing out) back the interval off so requests
+        do not pile up; the next tick starts one interval after this one started.
+        """
+        self._stats.tick(elapsed, self._cur_interval)
+        if elapsed > self._cur_interval * self.slow_ratio:
+            new = min(self.max_interval, self._cur_interval * 2)
+        elif elapsed < self.interval * self.slow_ratio / 2:
+            new = max(float(self.interval), self._cur_interval / 2)
+        else:
+            new = self._cur_interval
+        if new != self._cur_interval:
+            self._ev.change(f"[tick] {elapsed:.2f}s tick, interval {self._cur_interval:g}s -> {new:g}s")
+            self._cur_interval = new
+
+        summary = None
+        if time.monotonic() - self._stats.started >= self.stats_sec:
+            summary = self._stats.summary()
+            summary["interval_s"] = self._cur_interval
+        return max(0.0, self._cur_interval - elapsed), summary
+
+    def _timing_line(self, s):
+        phases = " ".join(f"{p}={s[p + '_avg_ms']}/{s[p + '_max_ms']}" for p in TickStats.PHASES)
+        return (f"[timing] ticks={s['ticks']} avg={s['avg_ms']}ms max={s['max_ms']}ms"
+                f" overruns={s['overruns']} skipped={s['skipped']} interval={s['interval_s']:g}s"
+                f" | avg/max ms {phases}")
+
+    def _report_timing(self, summary):
+        self.log(self._timing_line(summary))
+        self._ev.flush()
+        if self.timing_sensor:
+            try:
+                self.set_state(self.timing_sensor, state=summary["avg_ms"],
+                               attributes=dict(summary, unit_of_measurement="ms"))
+            except Exception as e:
+                self._ev.error(f"[timing] set_state {self.timing_sensor} failed: {e}", key="timing")
+
+    # ---------- Resolve room precedence ----------
+    def _read_room_flags(self):
+        table, get = self._rooms, self.get_state
+        masks, slot_room, slot_bit = table.masks, table.slot_room, table.slot_bit
+        for r in range(len(masks)):
+            masks[r] = 0
+        for slot, eid in enumerate(table.entities):
+            if eid is not None and get(eid) == "on":
+                masks[slot_room[slot]] |= slot_bit[slot]
+
+    def _changed_rooms(self):
+        """Resolve every room from its hazard mask; {room_id: state} for rooms that differ from _last."""
+        table, last = self._rooms, self._last
+        return {table.rooms[r]: st for r, st in enumerate(table.resolve_all())
+                if last.get(table.rooms[r]) != st}
+
+    def _tick_line(self, changed):
+        counts = self._rooms.counts()
+        hazards = " ".join(f"{k}={n}" for k, n in counts.items() if k != self._rooms.default)
+        return f"[tick] rooms={len(self._rooms.rooms)} changed={changed} {hazards}"
+
+    # ---------- Outbound writes (queued, see WriteQueue) ----------
+    def _flush(self, force=False):
+        q = self._queue
+        failures = q.failures
+        ok = q.flush(force)
+        self._after_flush(ok, failures)
+        return ok
+
+    def _after_flush(self, ok, failures_before):
+        q = self._queue
+        if ok:
+            self._ev.count("flushes")
+            if failures_before:
+                self._ev.change(f"[queue] Webdis back after {failures_before} failed flushes; backlog delivered")
+        elif ok is False:
+            self._ev.error(f"[queue] Webdis write failed; {len(q)} pending, retrying", key="flush")
+        if q.dropped:
+            # Keys were lost: forget what we think Webdis holds so the next reconcile rewrites everything
+            self._ev.error(f"[queue] {q.dropped} queued keys dropped (queue_max_keys={q.max_keys})", key="dropped")
+            q.dropped = 0
+            self._last.clear()
+            self._last_phase.clear()
 
     # ---------- Existing: write per-room state to Webdis ----------
-    def _write_room(self, room_id, state_str):
-        key = f"{self.key_prefix}{room_id}"
-        self._webdis_set(key, state_str)
+    def _write_rooms(self, states):
+        """
+        Queue every changed room: its key, plus its Room:state pair for pub_channel. The next
+        flush sends them as one MSET plus one comma-joined PUBLISH, so a scripted cascade
+        lands atomically (one MULTI/EXEC round trip over RESP). Returns the number of rooms.
+        """
+        if not states:
+            return 0
+        for room_id, state_str in states.items():
+            self._queue.set(f"{self.key_prefix}{room_id}", state_str)
         if self.publish_on_change and self.pub_channel:
-            self._webdis_publish(self.pub_channel, f"{room_id}:{state_str}")
-
-    # ---------- NEW: HA phase booleans -> Webdis (unconditional) ----------
+            self._queue.publish(self.pub_channel, states)
+        # _last is what Webdis will hold once the queue drains
+        self._last.update(states)
+        self._ev.count("room_writes", len(states))
+        self._ev.change(f"[rooms] {states}")
+        return len(states)
+
+    # ---------- NEW: HA phase booleans -> Webdis (change-only) ----------
     def _sync_phases_ha_to_webdis(self):
+        vals = {}
         for phase_key, entity in self.phase_ha.items():
             # If entity is missing in HA, skip gracefully
             try:
                 st = self.get_state(entity)
             except Exception as e:
-                self.log(f"[phase] get_state failed for {entity}: {e}")
+                self._ev.error(f"[phase] get_state failed for {entity}: {e}", key=f"phase:{entity}")
                 st = None
-
-            truthy = (st == "on")
-            val = "true" if truthy else "false"
-
-            self._webdis_set(phase_key, val)
-            if self.phase_pub_channel:
-                self._webdis_publish(self.phase_pub_channel, f"{phase_key}:{val}")
-
-            if self.verbose:
-                self.log(f"[phase] HA {entity}={st!r} -> Webdis {phase_key}={val}")
-
-    # ---------- NEW: Webdis layer flags -> HA (unconditional) ----------
+            vals[phase_key] = "true" if st == "on" else "false"
+        return self._write_phases(vals)
+
+    def _write_phases(self, vals):
+        """Queue only phases that differ from what we last wrote; returns how many."""
+        changed = {k: v for k, v in vals.items() if self._last_phase.get(k) != v}
+        if not changed:
+            return 0
+        for k, v in changed.items():
+            self._queue.set(k, v)
+        if self.phase_pub_channel:
+            # "Phase1:true,Phase3:false" - same Key:value pairs as before, comma-joined
+            self._queue.publish(self.phase_pub_channel, changed)
+        self._last_phase.update(changed)
+        self._ev.count("phase_writes", len(changed))
+        self._ev.change(f"[phase] {changed}")
+        return len(changed)
+
+    # ---------- NEW: Webdis layer flags -> HA (change-only) ----------
     def _sync_layers_webdis_to_ha(self):
-        vals = self._webdis_get_values(self.LAYER_KEYS)
-        if self.verbose:
-            self.log(f"[layers] Webdis MGET {self.LAYER_KEYS} -> {vals}")
+        vals = self._webdis.mget(self.LAYER_KEYS)
+        self._ev.count("layer_polls")
+        self._ev.debug(f"[layers] Webdis MGET {self.LAYER_KEYS} -> {vals}")
+        if vals is None:
+            # Unreachable: keep HA as it is rather than forcing every layer off
+            return False
 
         for key, val in zip(self.LAYER_KEYS, vals):
-            entity = self.layer_to_ha.get(key)
-            if not entity:
-                continue
+            self._apply_layer(key, val)
+        return True
+
+    def _apply_layer(self, key, val):
+        """turn_on/turn_off the layer's HA boolean, skipping the service call if it already matches."""
+        entity = self.layer_to_ha.get(key)
+        if not entity:
+            return
 
-            truthy = False
-            if val is not None:
-                s = str(val).strip().lower()
-                truthy = s in ("1", "true", "yes", "on")
+        on = truthy(val)
+        # get_state reads AppDaemon's state cache, so this check costs no HA call;
+        # it still corrects a boolean someone flipped by hand in HA
+        if self._last_layer.get(key) == on and self.get_state(entity) == ("on" if on else "off"):
+            return
+
+        try:
+            if on:
+                self.turn_on(entity)
+            else:
+                self.turn_off(entity)
+            self._last_layer[key] = on
+            self._ev.count("layer_applies")
+            self._ev.change(f"[layers] {'turn_on' if on else 'turn_off'}({entity}) (from {key}={val!r})")
+        except Exception as e:
+            self._ev.error(f"[layers] Failed to set {entity} from {key}: {e}", key=f"layer:{entity}")
 
+    # ---------- Optional: layer changes pushed over pub/sub ----------
+    def _layer_subscriber(self):
+        """Background thread: hand 'Key:value[,Key:value]' layer messages to the AppDaemon scheduler."""
+        backoff = 1.0
+        while not self._stop.is_set():
             try:
-                if truthy:
-                    self.turn_on(entity)
-                else:
-                    self.turn_off(entity)
-                if self.verbose:
-                    self.log(f"[layers] {'turn_on' if truthy else 'turn_off'}({entity}) (from {key}={val!r})")
+                for _channel, message in self._webdis.subscribe([self.layer_pub_channel], idle_timeout=300):
+                    backoff = 1.0
+                    if self._stop.is_set():
+                        return
+                    self.run_in(self._on_layer_message, 0, message=message)
             except Exception as e:
-                self.log(f"[layers] Failed to set {entity} from {key}: {e}")
+                self._ev.error(f"[layers] subscribe to {self.layer_pub_channel} dropped: {e}", key="layer_sub")
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    def _on_layer_message(self, kwargs):
+        for pair in str(kwargs.get("message", "")).split(","):
+            if ":" in pair:
+                key, val = pair.rsplit(":", 1)
+                if key.strip() in self.LAYER_KEYS:
+                    self._apply_layer(key.strip(), val)
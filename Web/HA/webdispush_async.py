@@ -0,0 +1,220 @@
+import os
+import sys
+import time
+import asyncio
+
+try:
+    from webdislib import AsyncWebdisClient, truthy
+except ImportError:
+    # Running from a repo checkout instead of an apps dir that holds a copy of webdislib/
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+    from webdislib import AsyncWebdisClient, truthy
+
+from webdispush import RPG2025RoomKeys, WriteQueue
+
+
+class RPG2025RoomKeysAsync(RPG2025RoomKeys):
+    """
+    Same bridge as RPG2025RoomKeys (same apps.yaml args, keys and channels), run as an
+    AppDaemon async app: callbacks are coroutines on AppDaemon's event loop and Webdis is
+    reached through aiohttp, so a stalled Webdis never holds one of AppDaemon's worker
+    threads. Each tick flushes the queued room/phase writes and reads layers concurrently;
+    the write queue, tick scheduling, the adaptive interval and timing summaries work as in
+    RPG2025RoomKeys.
+
+    apps.yaml:
+      rpg2025_room_keys:
+        module: webdispush_async
+        class: RPG2025RoomKeysAsync
+        webdis_url: http://192.168.30.114:7379
+        pool_size: 8
+
+    redis_url is ignored here: the async variant always talks to Webdis over HTTP.
+    """
+
+    async def initialize(self):
+        self._configure()
+        if self.redis_url:
+            self.log("[init] redis_url is not used by the async app; talking to Webdis over HTTP")
+        self._webdis = AsyncWebdisClient(self.webdis_url, self.timeout,
+                                         pool_size=int(self.args.get("pool_size", 8)),
+                                         log=self._transport_error)
+        self._queue = WriteQueue(self._webdis, self.queue_max_keys, self.retry_min, self.retry_max)
+        self._sub_task = None
+
+        if self.event_driven:
+            for eid in self._rooms.entity_slot:
+                await self.listen_state(self._on_room_entity, eid)
+            for phase_key, entity in self.phase_ha.items():
+                await self.listen_state(self._on_phase_entity, entity, phase_key=phase_key)
+
+        if self.layer_subscribe and self.layer_pub_channel:
+            self._sub_task = self.create_task(self._layer_subscriber())
+
+        self.log(f"[init] async Webdis={self.webdis_url} prefix={self.key_prefix} interval={self.interval}s"
+                 f" event_driven={self.event_driven} layer_subscribe={self.layer_subscribe}")
+        await self.run_in(self._tick, 0)
+
+    async def terminate(self):
+        if self._sub_task is not None:
+            self._sub_task.cancel()
+        await self._webdis.close()
+
+    # ---------- Event-driven: one HA entity changed ----------
+    async def _on_room_entity(self, entity, attribute, old, new, kwargs):
+        table = self._rooms
+        r = table.room_of(entity)
+        for slot in range(r * table.width, (r + 1) * table.width):
+            eid = table.entities[slot]
+            if eid is not None:
+                table.set_flag(slot, (new if eid == entity else await self.get_state(eid)) == "on")
+        state = table.states[r] = table.resolve(r)
+        room_id = table.rooms[r]
+        if self._last.get(room_id) != state:
+            self._write_rooms({room_id: state})
+            self._ev.change(f"[event] {entity}={new!r} -> {room_id}={state}")
+            await self._flush()
+
+    async def _on_phase_entity(self, entity, attribute, old, new, kwargs):
+        if self._write_phases({kwargs["phase_key"]: "true" if new == "on" else "false"}):
+            await self._flush()
+
+    # ---------- Periodic tick ----------
+    async def _tick(self, _kwargs):
+        if not self._tick_lock.acquire(blocking=False):
+            self._stats.skipped += 1
+            return
+        start = time.monotonic()
+        try:
+            await self._run_tick()
+        finally:
+            self._tick_lock.release()
+            delay, summary = self._after_tick(time.monotonic() - start)
+            await self.run_in(self._tick, delay)
+            if summary:
+                await self._report_timing(summary)
+
+    async def _timed(self, name, coro):
+        with self._stats.phase(name):
+            return await coro
+
+    async def _run_tick(self):
+        now = time.monotonic()
+        reconcile = not self.event_driven or now - self._last_reconcile >= self.reconcile
+        changed = 0
+        stats = self._stats
+        if reconcile:
+            self._last_reconcile = now
+            with stats.phase("read_ha"):
+                table = self._rooms
+                for r in range(len(table.masks)):
+                    table.masks[r] = 0
+                for slot, eid in enumerate(table.entities):
+                    if eid is not None and await self.get_state(eid) == "on":
+                        table.masks[table.slot_room[slot]] |= table.slot_bit[slot]
+            with stats.phase("resolve"):
+                rooms = self._changed_rooms()
+            with stats.phase("rooms"):
+                changed = self._write_rooms(rooms)
+            with stats.phase("phases"):
+                await self._sync_phases_ha_to_webdis()
+
+        # The queued writes and the layer poll wait on Webdis side by side
+        jobs = [self._timed("flush", self._flush())]
+        if reconcile or not self.layer_subscribe:
+            jobs.append(self._timed("layers", self._sync_layers_webdis_to_ha()))
+        results = await asyncio.gather(*jobs)
+        if len(results) > 1 and results[1] and len(self._queue):
+            # Webdis is back: replay the backlog now instead of waiting out the retry backoff
+            await self._timed("flush", self._flush(force=True))
+
+        if reconcile:
+            line = self._tick_line(changed)
+            if changed:
+                self._ev.change(line)
+            else:
+                self._ev.debug(line)
+
+    async def _report_timing(self, summary):
+        self.log(self._timing_line(summary))
+        self._ev.flush()
+        if self.timing_sensor:
+            try:
+                await self.set_state(self.timing_sensor, state=summary["avg_ms"],
+                                     attributes=dict(summary, unit_of_measurement="ms"))
+            except Exception as e:
+                self._ev.error(f"[timing] set_state {self.timing_sensor} failed: {e}", key="timing")
+
+    # ---------- Webdis writes (room/phase queueing is inherited) ----------
+    async def _flush(self, force=False):
+        q = self._queue
+        failures = q.failures
+        batch = q.begin(force)
+        ok = None
+        if batch is not None:
+            ok = q.settle(*batch, await q.pipeline(*batch).execute())
+        self._after_flush(ok, failures)
+        return ok
+
+    async def _sync_phases_ha_to_webdis(self):
+        vals = {}
+        for phase_key, entity in self.phase_ha.items():
+            try:
+                st = await self.get_state(entity)
+            except Exception as e:
+                self._ev.error(f"[phase] get_state failed for {entity}: {e}", key=f"phase:{entity}")
+                st = None
+            vals[phase_key] = "true" if st == "on" else "false"
+        return self._write_phases(vals)
+
+    # ---------- Webdis layer flags -> HA ----------
+    async def _sync_layers_webdis_to_ha(self):
+        vals = await self._webdis.mget(self.LAYER_KEYS)
+        self._ev.count("layer_polls")
+        self._ev.debug(f"[layers] Webdis MGET {self.LAYER_KEYS} -> {vals}")
+        if vals is None:
+            return False
+        await asyncio.gather(*(self._apply_layer(key, val) for key, val in zip(self.LAYER_KEYS, vals)))
+        return True
+
+    async def _apply_layer(self, key, val):
+        entity = self.layer_to_ha.get(key)
+        if not entity:
+            return
+
+        on = truthy(val)
+        if self._last_layer.get(key) == on and await self.get_state(entity) == ("on" if on else "off"):
+            return
+
+        try:
+            if on:
+                await self.turn_on(entity)
+            else:
+                await self.turn_off(entity)
+            self._last_layer[key] = on
+            self._ev.count("layer_applies")
+            self._ev.change(f"[layers] {'turn_on' if on else 'turn_off'}({entity}) (from {key}={val!r})")
+        except Exception as e:
+            self._ev.error(f"[layers] Failed to set {entity} from {key}: {e}", key=f"layer:{entity}")
+
+    async def _layer_subscriber(self):
+        """Task: apply 'Key:value[,Key:value]' layer messages as they arrive on layer_pub_channel."""
+        backoff = 1.0
+        while True:
+            try:
+                async for _channel, message in self._webdis.subscribe([self.layer_pub_channel], idle_timeout=300):
+                    backoff = 1.0
+                    await self._on_layer_message({"message": message})
+            except asyncio.CancelledError:
+                return
+            except Exception as e:
+                self._ev.error(f"[layers] subscribe to {self.layer_pub_channel} dropped: {e!r}", key="layer_sub")
+            await self.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    async def _on_layer_message(self, kwargs):
+        for pair in str(kwargs.get("message", "")).split(","):
+            if ":" in pair:
+                key, val = pair.rsplit(":", 1)
+                if key.strip() in self.LAYER_KEYS:
+                    await self._apply_layer(key.strip(), val)
@@ -1,79 +1,685 @@
-import RPi.GPIO as GPIO
+import os
+import sys
+import socket
 import time
-from flask import Flask, request, jsonify
+import json
+import math
+import asyncio
+import argparse
 import logging
 import threading
+import heapq
+import itertools
+from collections import deque
 
+try:
+    import RPi.GPIO as GPIO
+except ImportError:
+    GPIO = None   # not on a Pi: --backend sim
 
-#Curretly using Flask to listen for webhooks
+try:
+    from flask import Flask, request, jsonify
+except ImportError:
+    Flask = None  # only needed for --server flask
+
+# Shared Webdis/Redis client, only needed for --subscribe: repo root in a checkout, or a copy of webdislib/ next to this file
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    from webdislib import connect
+except ImportError:
+    connect = None
+
+
+#Listens for webhooks on a small asyncio HTTP server (default) or the old Flask dev server (--server flask),
+#and/or fires cues from Redis pub/sub messages (--subscribe)
 #Obviously never run this in any permanent or enterprise environment. 
 #Use at own risk.
 #TODO: 
 #1. Move to authenticated webserver
-#2. Require Pin command AND duration as separate values 
+#2. ~~Require Pin command AND duration as separate values~~ (per-key duration, sequences and cues, see build_steps)
 #3. Battle Harden 
 
-app = Flask(__name__)
+# Logging goes to webhook.log; per-request detail only with --debug (see main)
+log = logging.getLogger("relay")
+
+MAX_BODY = 16 * 1024       # bytes; larger webhook bodies get 413
+KEEPALIVE_TIMEOUT = 30     # seconds an idle keep-alive connection is held open
+
+#Waveshare RPi Relay Board (B): channel 1..8 -> BCM pin (see readme.txt). Override with --channels file.
+#Can obviously clean these up at some stage. GOSMOKE is arbitrary. Balance between exposing pins directly and coming up with goofy code names. 
+DEFAULT_CHANNELS = {
+    "GOSMOKE": 5,   # Channel 1
+    "SC1": 6,       # Channel 2
+    "SC2": 13,      # Channel 3
+    "SC3": 16,      # Channel 4
+    "SC4": 19,      # Channel 5
+    "CH6": 20,      # Channel 6
+    "CH7": 21,      # Channel 7
+    "CH8": 26,      # Channel 8
+}
+
+#Groups switch several channels with one GPIO write: {"SMOKE_ALL": 1}
+DEFAULT_GROUPS = {
+    "SMOKE_ALL": ["SC1", "SC2", "SC3", "SC4"],
+}
+
+pin_mapping = dict(DEFAULT_CHANNELS)
+groups = {name: list(keys) for name, keys in DEFAULT_GROUPS.items()}
 
-# Set up logging - Possibility here to get more serious logging going, however the goal here was to create an easy way to check on HA components. 
-logging.basicConfig(filename='webhook.log', level=logging.DEBUG)
 
-# Set up the GPIO
-GPIO.setmode(GPIO.BCM)
-GPIO.setup(5, GPIO.OUT, initial=GPIO.HIGH)  # GOSMOKE
-GPIO.setup(6, GPIO.OUT, initial=GPIO.HIGH)  # SC1
-GPIO.setup(13, GPIO.OUT, initial=GPIO.HIGH) # SC2
-GPIO.setup(16, GPIO.OUT, initial=GPIO.HIGH) # SC3
-GPIO.setup(19, GPIO.OUT, initial=GPIO.HIGH) # SC4
+def load_channels(path):
+    """
+    Replace pin_mapping/groups from a JSON file:
+      {"channels": {"GOSMOKE": 5, ...}, "groups": {"SMOKE_ALL": ["SC1", "SC2"]}}
+    (a flat {"NAME": pin} object is taken as channels only).
+    """
+    with open(path) as f:
+        cfg = json.load(f)
+    channels = cfg.get("channels", cfg) if isinstance(cfg, dict) else None
+    if not isinstance(channels, dict) or not channels:
+        raise ValueError(f"{path}: no channels")
+    channels = {str(k): int(v) for k, v in channels.items() if k != "groups"}
+    if len(set(channels.values())) != len(channels):
+        raise ValueError(f"{path}: a BCM pin is mapped to more than one channel")
+    new_groups = cfg.get("groups", {})
+    for name, keys in new_groups.items():
+        missing = [k for k in keys if k not in channels]
+        if missing:
+            raise ValueError(f"{path}: group {name} names unknown channels {missing}")
+    pin_mapping.clear()
+    pin_mapping.update(channels)
+    groups.clear()
+    groups.update({name: list(keys) for name, keys in new_groups.items()})
 
 
-#Can obviously clean these up at some stage. GOSMOKE is arbitrary. Balance between exposing pins directly and coming up with goofy code names. 
-pin_mapping = {
-    "GOSMOKE": 5,
-    "SC1": 6,
-    "SC2": 13,
-    "SC3": 16,
-    "SC4": 19
+# ---------- GPIO backends ----------
+class RPiGPIOBackend:
+    """Relays on the Pi header via RPi.GPIO. The Waveshare board is active-low: LOW closes a relay."""
+
+    def __init__(self):
+        if GPIO is None:
+            raise RuntimeError("RPi.GPIO is not installed; use --backend sim off the Pi")
+
+    def setup(self, pins):
+        GPIO.setwarnings(False)
+        GPIO.setmode(GPIO.BCM)
+        GPIO.setup(list(pins), GPIO.OUT, initial=GPIO.HIGH)
+
+    def write(self, changes):
+        """changes: {pin: on}. One GPIO.output call for the whole group."""
+        pins = list(changes)
+        GPIO.output(pins, [GPIO.LOW if changes[p] else GPIO.HIGH for p in pins])
+
+    def cleanup(self):
+        GPIO.cleanup()
+
+
+class SimBackend:
+    """Stand-in for testing off the Pi: tracks pin states and keeps the last writes with timestamps."""
+
+    def __init__(self, keep=1000):
+        self.state = {}
+        self.writes = deque(maxlen=keep)   # (monotonic, {pin: on})
+
+    def setup(self, pins):
+        self.state = dict.fromkeys(pins, False)
+
+    def write(self, changes):
+        self.state.update(changes)
+        self.writes.append((time.monotonic(), dict(changes)))
+        log.debug(f'[sim] {changes}')
+
+    def cleanup(self):
+        pass
+
+
+DEFAULT_DURATION = 5   # seconds, for plain {"KEY": 1} requests
+MAX_DURATION = 60      # safety cap for any single activation
+MAX_STEPS = 256        # per request
+MAX_OFFSET = 600       # latest a step may end, seconds after the request
+
+#Named cues: one request {"cue": "SMOKE_STAGGER"} fires the whole timeline.
+#Steps use the same fields as a sequence step: key, at (offset s), duration, repeat, interval, ramp.
+cues = {
+    "SMOKE_STAGGER": [
+        {"key": "GOSMOKE", "at": 0, "duration": 6},
+        {"key": "SC1", "at": 0, "duration": 2},
+        {"key": "SC2", "at": 1, "duration": 2},
+        {"key": "SC3", "at": 2, "duration": 2},
+        {"key": "SC4", "at": 3, "duration": 2},
+    ],
+    "SC_STROBE": [
+        {"key": "SC1", "at": 0, "duration": 0.2, "repeat": 10, "interval": 0.5},
+        {"key": "SC3", "at": 0.25, "duration": 0.2, "repeat": 10, "interval": 0.5},
+    ],
+    "SMOKE_RAMP": [
+        {"key": "GOSMOKE", "at": 0, "duration": 0.5, "repeat": 5, "interval": 3, "ramp": 0.5},
+    ],
 }
 
-def activate_pin(pin, duration):
-    GPIO.output(pin, GPIO.LOW)  # Activate pin
-    time.sleep(duration)
-    GPIO.output(pin, GPIO.HIGH)  # Deactivate pin
 
-@app.route('/webhook', methods=['POST'])
-def webhook():
-    data = request.json
-    app.logger.debug(f'Received data: {data}')
-    if not data:
-        return jsonify({"error": "Invalid data"}), 400
+def expand_step(key, spec, limit=MAX_STEPS):
+    """
+    One key's spec -> [(pin, offset, duration)]; repeat/interval make pulse trains, ramp
+    grows each pulse. A group key yields the same timing for each of its channels.
+    Raises ValueError before expanding if that would make more than limit steps.
+    """
+    if not isinstance(spec, dict):
+        raise ValueError(f"Step for {key} is not an object: {spec!r}")
+    if key in groups:
+        pins = [pin_mapping[k] for k in groups[key]]
+    elif key in pin_mapping:
+        pins = [pin_mapping[key]]
+    else:
+        raise ValueError(f"Unknown key {key!r}")
+    duration = float(spec.get("duration", DEFAULT_DURATION))
+    at = float(spec.get("at", 0))
+    repeat = int(spec.get("repeat", 1))
+    interval = float(spec.get("interval", duration * 2))
+    ramp = float(spec.get("ramp", 0))
+    #NaN/inf would poison the scheduler heap, so check them before anything else
+    if not all(map(math.isfinite, (duration, at, interval, ramp))):
+        raise ValueError(f"Non-finite timing for {key}: {spec}")
+    if at < 0 or repeat < 1 or interval <= 0:
+        raise ValueError(f"Bad step for {key}: {spec}")
+    if repeat * len(pins) > limit:
+        raise ValueError(f"More than {MAX_STEPS} steps in one request")
+    end = at + (repeat - 1) * (interval + max(ramp, 0)) + duration
+    if end > MAX_OFFSET:
+        raise ValueError(f"{key} runs until +{end}s, past the {MAX_OFFSET}s limit")
+    steps = []
+    for i in range(repeat):
+        d = duration + i * ramp
+        if not 0 < d <= MAX_DURATION:
+            raise ValueError(f"Duration {d} for {key} outside (0, {MAX_DURATION}]")
+        steps += [(pin, at + i * interval, d) for pin in pins]
+    return steps
 
-    try:
-        for key, value in data.items():
+
+def build_steps(data):
+    """
+    Webhook JSON -> [(pin, offset, duration)]. Accepts, in any mix:
+      {"SC1": 1}, {"SMOKE_ALL": 1}                     default pulse (channel or group)
+      {"SC1": {"duration": 2, "repeat": 3}}            per-key duration / pulse train
+      {"sequence": [{"key": "SC1", "at": 0.5, ...}]}   explicit timeline
+      {"cue": "SMOKE_STAGGER"} or {"cue": [...names]}  named cues
+    """
+    steps = []
+    for key, value in data.items():
+        if key == "sequence":
+            for spec in value:
+                if not isinstance(spec, dict):
+                    raise ValueError(f"Sequence step is not an object: {spec!r}")
+                steps += expand_step(spec.get("key"), spec, MAX_STEPS - len(steps))
+        elif key == "cue":
+            for name in ([value] if isinstance(value, str) else value):
+                if name not in cues:
+                    raise ValueError(f"Unknown cue {name!r}")
+                for spec in cues[name]:
+                    steps += expand_step(spec["key"], spec, MAX_STEPS - len(steps))
         #Check that the key value actually matches something we are interested in
-            if key in pin_mapping and int(value) == 1:
-                pin = pin_mapping[key]
-                app.logger.debug(f'Activating {key} on pin {pin}')
-                print(f'Activating {key} on pin {pin}')
-                duration = 5  # Hardcoded duration, requirement only for testing. 
-                threading.Thread(target=activate_pin, args=(pin, duration)).start()
-
-        return jsonify({"message": "Success"}), 200
-    except ValueError as e:
-        app.logger.error(f'ValueError: {e}')
-        return jsonify({"error": f'Invalid data: {e}'}), 400
+        elif key in pin_mapping or key in groups:
+            if isinstance(value, dict):
+                steps += expand_step(key, value, MAX_STEPS - len(steps))
+            elif int(value) == 1:
+                steps += expand_step(key, {}, MAX_STEPS - len(steps))
+        if len(steps) > MAX_STEPS:
+            raise ValueError(f"More than {MAX_STEPS} steps in one request")
+    return steps
+
+
+class RelayScheduler:
+    """
+    One timer thread drives every relay, instead of a sleeping thread per activation.
+    The heap holds (when, seq, pin, duration): a duration means "switch on at when",
+    None means "release check". Activating a pin that is already on just moves its
+    release out to the later deadline, so overlapping activations merge into one longer
+    pulse instead of one's HIGH cutting another's LOW short.
+
+    Timelines are drift-free: every step's start is t0 + offset on the monotonic clock and
+    its release is measured from that scheduled start, not from when the thread woke up,
+    so late wakeups never accumulate along a sequence.
+
+    Every change due at the same moment (a group, or cue steps sharing an offset) goes to
+    the backend as one write, so those relays switch together. An error in one batch is
+    logged and the thread carries on; a failed release is retried after RELEASE_RETRY.
+    """
+
+    RELEASE_RETRY = 1.0  # seconds
+
+    def __init__(self, backend):
+        self._backend = backend
+        self._cond = threading.Condition()
+        self._heap = []        # (when, seq, pin, duration or None)
+        self._seq = itertools.count()
+        self._release_at = {}  # pin -> current release deadline (monotonic)
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def activate(self, pin, duration, at=None, defer=False):
+        """
+        Hold pin on for duration seconds from monotonic time at (now if None). With defer,
+        even an immediate start is left to the timer thread, so the caller never touches GPIO.
+        """
+        self.run_timeline([(pin, 0.0, duration)], defer, at)
+
+    def run_timeline(self, steps, defer=False, t0=None):
+        """Schedule [(pin, offset, duration)] against one shared start time."""
+        now = time.monotonic()
+        t0 = now if t0 is None else t0
+        changes = {}
+        with self._cond:
+            for pin, offset, duration in steps:
+                start = t0 + offset
+                if start <= now and not defer:
+                    self._turn_on(pin, start + duration, changes)
+                else:
+                    self._push(start, pin, duration)
+            if changes:
+                self._backend.write(changes)
+
+    def depth(self):
+        """Pins currently held on, heap entries (pending starts plus one release per pin) and timer health."""
+        with self._cond:
+            return {"active": len(self._release_at), "queued": len(self._heap),
+                    "timer_alive": self._thread.is_alive(), "errors": self.errors}
+
+    def release_all(self):
+        with self._cond:
+            if self._release_at:
+                self._backend.write(dict.fromkeys(self._release_at, False))
+            self._release_at.clear()
+            self._heap.clear()
+
+    def _push(self, when, pin, duration):
+        if not math.isfinite(when):
+            raise ValueError(f"Non-finite deadline for pin {pin}")
+        heapq.heappush(self._heap, (when, next(self._seq), pin, duration))
+        self._cond.notify()
+
+    def _turn_on(self, pin, deadline, changes):
+        current = self._release_at.get(pin)
+        if current is None:
+            changes[pin] = True  # Activate pin
+            self._release_at[pin] = deadline
+            self._push(deadline, pin, None)
+        elif deadline > current:
+            # Already on: only move the release; the timer re-queues it when the old entry fires
+            self._release_at[pin] = deadline
+
+    def _run(self):
+        with self._cond:
+            while True:
+                try:
+                    self._step()
+                except Exception:
+                    self.errors += 1
+                    log.exception('Relay timer error')
+
+    def _step(self):
+        """One wait-or-switch pass of the timer thread; called with _cond held."""
+        if not self._heap:
+            self._cond.wait()
+            return
+        wait = self._heap[0][0] - time.monotonic()
+        if wait > 0:
+            self._cond.wait(min(wait, 60))
+            return
+        # Take everything that is due, then switch it all in one backend write.
+        # Releases queued while handling these wait for the next pass, so a pulse
+        # shorter than the wakeup lag still turns on before it turns off.
+        due = []
+        now = time.monotonic()
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap))
+        changes = {}
+        for when, _, pin, duration in due:
+            if duration is not None:
+                self._turn_on(pin, when + duration, changes)
+                continue
+            current = self._release_at.get(pin)
+            if current is None:
+                continue
+            if current > when:
+                self._push(current, pin, None)  # extended since it was queued
+            else:
+                changes[pin] = False  # Deactivate pin
+                del self._release_at[pin]
+        if not changes:
+            return
+        try:
+            self._backend.write(changes)
+        except Exception:
+            # Keep the released pins on the books so they are switched off on a later pass
+            retry = time.monotonic() + self.RELEASE_RETRY
+            for pin, on in changes.items():
+                if not on and pin not in self._release_at:
+                    self._release_at[pin] = retry
+                    self._push(retry, pin, None)
+            raise
+
+
+relay_backend = None
+scheduler = None
+
+
+def init(backend="gpio", channels_file=None):
+    """Load the channel map, set up the GPIO backend and start the scheduler."""
+    global relay_backend, scheduler
+    if channels_file:
+        load_channels(channels_file)
+    if backend == "auto":
+        backend = "gpio" if GPIO is not None else "sim"
+        if backend == "sim":
+            #Loud on purpose: every webhook still answers 200 but no relay moves
+            msg = 'RPi.GPIO is not available: --backend auto is SIMULATING relays, nothing will switch'
+            log.warning(msg)
+            print(f'WARNING: {msg}')
+    relay_backend = RPiGPIOBackend() if backend == "gpio" else SimBackend()
+    relay_backend.setup(pin_mapping.values())
+    scheduler = RelayScheduler(relay_backend)
+    log.info(f'{backend} backend, channels {pin_mapping}, groups {groups}')
+    return scheduler
+
+
+def handle_webhook(data, defer=False):
+    """Shared by both servers: webhook JSON -> (HTTP status, response dict)."""
+    log.debug(f'Received data: {data}')
+    if not data or not isinstance(data, dict):
+        return 400, {"error": "Invalid data"}
+
+    try:
+        steps = build_steps(data)
+        if log.isEnabledFor(logging.DEBUG):
+            for pin, offset, duration in steps:
+                log.debug(f'Scheduling pin {pin} at +{offset}s for {duration}s')
+        scheduler.run_timeline(steps, defer)
+        return 200, {"message": "Success", "steps": len(steps)}
+    except (ValueError, TypeError, KeyError, OverflowError) as e:
+        log.error(f'ValueError: {e}')
+        return 400, {"error": f'Invalid data: {e}'}
     except Exception as e:
-        app.logger.error(f'Exception: {e}')
-        return jsonify({"error": f'Server error: {e}'}), 500
+        log.error(f'Exception: {e}')
+        return 500, {"error": f'Server error: {e}'}
 
-@app.route('/')
-def index():
-    return "Webhook listener is running", 200
 
-if __name__ == '__main__':
+# ---------- asyncio HTTP server (default) ----------
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           411: "Length Required", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def route(method, path, body):
+    """(status, body bytes, content type) for one request."""
+    path = path.split("?", 1)[0]
+    if path == "/webhook":
+        if method != "POST":
+            return 405, b'{"error": "POST only"}', "application/json"
+        try:
+            data = json.loads(body) if body else None
+        except ValueError:
+            data = None
+        # Relays go to the timer thread, so the event loop never waits on GPIO
+        status, out = handle_webhook(data, defer=True)
+        return status, json.dumps(out).encode(), "application/json"
+    if path == "/status" and method == "GET":
+        return 200, json.dumps(scheduler.depth()).encode(), "application/json"
+    if path == "/" and method == "GET":
+        return 200, b"Webhook listener is running", "text/plain"
+    return 404, b'{"error": "Not found"}', "application/json"
+
+
+async def read_headers(reader):
+    """Header lines up to the blank line -> {lowercase name: value}."""
+    headers = {}
+    while True:
+        h = await reader.readline()
+        if h in (b"\r\n", b"\n", b""):
+            return headers
+        if len(headers) >= 64:
+            raise ConnectionError("too many headers")
+        k, _, v = h.decode("latin-1").partition(":")
+        headers[k.strip().lower()] = v.strip()
+
+
+async def handle_connection(reader, writer):
+    """HTTP/1.1 with keep-alive, so HA's rest_command can reuse one connection."""
+    try:
+        while True:
+            try:
+                line = await asyncio.wait_for(reader.readline(), KEEPALIVE_TIMEOUT)
+            except asyncio.TimeoutError:
+                break
+            if not line:
+                break
+            try:
+                method, path, version = line.decode("latin-1").split()
+            except ValueError:
+                break
+            try:
+                #A client that stalls mid-request gets the same deadline as an idle one
+                headers = await asyncio.wait_for(read_headers(reader), KEEPALIVE_TIMEOUT)
+            except asyncio.TimeoutError:
+                break
+
+            conn = headers.get("connection", "").lower()
+            keep = conn == "keep-alive" if version == "HTTP/1.0" else conn != "close"
+            length = headers.get("content-length") or "0"
+            if "transfer-encoding" in headers:
+                status, out, ctype, keep = 411, b'{"error": "Content-Length required"}', "application/json", False
+            elif not length.isdigit():
+                status, out, ctype, keep = 400, b'{"error": "Bad Content-Length"}', "application/json", False
+            elif int(length) > MAX_BODY:
+                status, out, ctype, keep = 413, b'{"error": "Body too large"}', "application/json", False
+            else:
+                length = int(length)
+                try:
+                    body = await asyncio.wait_for(reader.readexactly(length), KEEPALIVE_TIMEOUT) if length else b""
+                except asyncio.TimeoutError:
+                    break
+                status, out, ctype = route(method, path, body)
+
+            writer.write(
+                f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: {ctype}\r\nContent-Length: {len(out)}\r\n"
+                f"Connection: {'keep-alive' if keep else 'close'}\r\n\r\n".encode("latin-1") + out)
+            await writer.drain()
+            if not keep:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host, port):
+    server = await asyncio.start_server(handle_connection, host, port)
+    log.info(f'Listening on {host}:{port}')
+    print(f'Relay webhook listener on http://{host}:{port}/webhook')
+    async with server:
+        await server.serve_forever()
+
+
+# ---------- pub/sub subscriber (--subscribe) ----------
+#What a "Key:state" pair on a subscribed channel fires: "Room:state" or "*:state" -> webhook body.
+#The room bridge publishes "Medical_Room:fire,Reactor_Core_Room:fire" on rpg2025_room_updates.
+DEFAULT_TRIGGERS = {
+    "*:fire": {"cue": "SMOKE_STAGGER"},
+}
+
+triggers = dict(DEFAULT_TRIGGERS)
+
+ROOM_KEY_PREFIX = "rpg2025_room_"  # room state keys re-read after every (re)subscribe
+SUBSCRIBE_IDLE = 300               # seconds of silence before the stream is reopened
+
+
+def load_triggers(path):
+    """Replace triggers from a JSON file; every body is checked with build_steps up front."""
+    with open(path) as f:
+        cfg = json.load(f)
+    for pattern, body in cfg.items():
+        if ":" not in pattern:
+            raise ValueError(f"{path}: trigger {pattern!r} is not Key:state")
+        build_steps(body)
+    triggers.clear()
+    triggers.update(cfg)
+
+
+def handle_message(message, last_states, fire=True):
+    """
+    One pub/sub message -> relays. A JSON object is run as a webhook body (publish cues
+    directly); otherwise it is read as comma-joined Key:state pairs and each pair that
+    changed since the last message fires its trigger (exact key first, then "*").
+    With fire=False the states are only recorded. Returns the number of relay steps scheduled.
+    """
+    text = str(message).strip()
+    if text.startswith("{"):
+        try:
+            data = json.loads(text)
+        except ValueError:
+            log.error(f'Bad JSON cue message: {text[:80]!r}')
+            return 0
+        status, out = handle_webhook(data, defer=True)
+        return out.get("steps", 0)
+
+    fired = 0
+    for pair in text.split(","):
+        key, sep, state = pair.rpartition(":")
+        if not sep:
+            continue
+        key, state = key.strip(), state.strip()
+        if last_states.get(key) == state:
+            continue
+        last_states[key] = state
+        body = triggers.get(f"{key}:{state}") or triggers.get(f"*:{state}")
+        if body and fire:
+            log.info(f'{key}:{state} -> {body}')
+            status, out = handle_webhook(body, defer=True)
+            fired += out.get("steps", 0)
+    return fired
+
+
+def resync(client, prefix, last_states, fire=True):
+    """
+    Read every prefix* room key and run it through handle_message, so a state published
+    while no subscription was open still fires. Returns steps scheduled, or None if the
+    keys could not be read.
+    """
+    names = client.keys(prefix + "*")
+    vals = client.mget(names) if names else names
+    if vals is None:
+        return None
+    pairs = [f"{name[len(prefix):]}:{val}" for name, val in zip(names, vals) if val is not None]
+    return handle_message(",".join(pairs), last_states, fire)
+
+
+def subscriber(client, channels, room_prefix=ROOM_KEY_PREFIX):
+    """
+    Thread: hold a SUBSCRIBE open (RESP or Webdis stream) and fire triggers. A quiet
+    channel just reopens the stream; connection errors back off 1s..30s. Each time the
+    subscription is confirmed the room keys are re-read (the first read only records
+    them), so a Room:fire published during a reconnect is not lost.
+    """
+    backoff = 1.0
+    last_states = {}
+    seeded = False
+
+    def on_subscribe():
+        nonlocal backoff, seeded
+        backoff = 1.0
+        if room_prefix:
+            fired = resync(client, room_prefix, last_states, fire=seeded)
+            if fired is None:
+                log.warning(f'Could not re-read {room_prefix}* after subscribing')
+            else:
+                seeded = True
+                if fired:
+                    log.info(f'Resync after subscribing fired {fired} steps')
+
+    while True:
+        try:
+            for _channel, message in client.subscribe(channels, idle_timeout=SUBSCRIBE_IDLE,
+                                                      on_subscribe=on_subscribe):
+                handle_message(message, last_states)
+            log.warning(f'Subscription to {channels} ended')
+        except socket.timeout:
+            log.debug(f'No messages on {channels} for {SUBSCRIBE_IDLE}s, resubscribing')
+            continue
+        except Exception as e:
+            log.warning(f'Subscription to {channels} dropped: {e}')
+        time.sleep(backoff)
+        backoff = min(backoff * 2, 30.0)
+
+
+# ---------- Flask dev server (--server flask) ----------
+def make_flask_app():
+    app = Flask(__name__)
+
+    @app.route('/webhook', methods=['POST'])
+    def webhook():
+        status, out = handle_webhook(request.json)
+        return jsonify(out), status
+
+    @app.route('/')
+    def index():
+        return "Webhook listener is running", 200
+
+    @app.route('/status')
+    def status():
+        return jsonify(scheduler.depth()), 200
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Relay webhook listener")
+    parser.add_argument("--server", choices=["async", "flask", "none"], default="async",
+                        help="none: no HTTP listener (use with --subscribe)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--backend", choices=["gpio", "sim", "auto"], default="gpio",
+                        help="relay driver; sim only simulates, auto falls back to sim (with a warning) without RPi.GPIO")
+    parser.add_argument("--channels", help="JSON channel/group map (default: all 8 Waveshare channels)")
+    parser.add_argument("--subscribe", action="append", metavar="CHANNEL",
+                        help="fire triggers from this pub/sub channel (repeatable), e.g. rpg2025_room_updates")
+    parser.add_argument("--webdis", default="http://192.168.30.114:7379", help="Webdis URL for --subscribe")
+    parser.add_argument("--redis", help="redis://host:port to subscribe over RESP directly (Webdis is the fallback)")
+    parser.add_argument("--room-prefix", default=ROOM_KEY_PREFIX,
+                        help="room keys re-read after each (re)subscribe; empty to skip")
+    parser.add_argument("--triggers", help="JSON {\"Room:state\" or \"*:state\": webhook body} for --subscribe")
+    parser.add_argument("--debug", action="store_true", help="log every request to webhook.log")
+    args = parser.parse_args()
+
+    # Set up logging - per-request lines only with --debug, to keep SD card writes down
+    logging.basicConfig(filename='webhook.log', level=logging.DEBUG if args.debug else logging.INFO)
+    init(args.backend, args.channels)
+    if args.triggers:
+        load_triggers(args.triggers)
+
+    if args.subscribe:
+        if connect is None:
+            raise SystemExit("--subscribe needs webdislib (copy it next to this script)")
+        client = connect(args.webdis, args.redis)
+        threading.Thread(target=subscriber, args=(client, args.subscribe, args.room_prefix), daemon=True).start()
+        print(f'Subscribed to {args.subscribe}')
+    elif args.server == "none":
+        raise SystemExit("--server none only makes sense with --subscribe")
+
     try:
-        app.run(host='0.0.0.0', port=5000)
+        if args.server == "none":
+            threading.Event().wait()
+        elif args.server == "flask":
+            if Flask is None:
+                raise SystemExit("--server flask needs Flask installed (pip install flask)")
+            make_flask_app().run(host=args.host, port=args.port)
+        else:
+            asyncio.run(serve(args.host, args.port))
     except KeyboardInterrupt:
         print("Interrupted by user")
     finally:
-        GPIO.cleanup()
+        scheduler.release_all()
+        relay_backend.cleanup()
+
+
+if __name__ == '__main__':
+    main()
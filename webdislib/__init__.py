@@ -0,0 +1,27 @@
+# webdislib
+# Shared Webdis client for the terminal, the AppDaemon bridge and the tools.
+# Copy this directory next to the script (or into the AppDaemon apps dir) when deploying
+# a component on its own.
+
+from .client import BaseClient, WebdisClient, WebdisHealth, Pipeline, SubscribeStream
+from .aio import AsyncWebdisClient, AsyncPipeline
+from .resp import RespClient, RespConnection, RespError, connect
+from .values import decode_value, decode_reply, reply_ok, truthy
+
+__all__ = [
+    "BaseClient",
+    "WebdisClient",
+    "WebdisHealth",
+    "Pipeline",
+    "SubscribeStream",
+    "AsyncWebdisClient",
+    "AsyncPipeline",
+    "RespClient",
+    "RespConnection",
+    "RespError",
+    "connect",
+    "decode_value",
+    "decode_reply",
+    "reply_ok",
+    "truthy",
+]
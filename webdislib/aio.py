@@ -0,0 +1,200 @@
+# webdislib/aio.py
+# Non-blocking Webdis client for asyncio callers (AppDaemon async apps).
+
+import json
+import asyncio
+from urllib import parse
+
+try:
+    import aiohttp
+except Exception:
+    aiohttp = None
+
+from .client import WebdisHealth, Pipeline, SubscribeStream, TIMEOUT, MGET_BATCH
+from .values import decode_value, decode_reply, reply_ok
+
+
+class AsyncWebdisClient:
+    """
+    asyncio counterpart of WebdisClient on one pooled aiohttp.ClientSession (keep-alive,
+    at most pool_size connections in flight). Same conventions: reads return None when
+    Webdis is unreachable, writes return False. Independent requests run concurrently,
+    so a slow Webdis costs one timeout per batch rather than one per key.
+    """
+
+    def __init__(self, base, timeout=TIMEOUT, pool_size=8, batch=MGET_BATCH,
+                 fail_fast=True, health=None, log=None):
+        if aiohttp is None:
+            raise RuntimeError("AsyncWebdisClient needs aiohttp")
+        self.base = base.rstrip("/")
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.batch = batch
+        self.fail_fast = fail_fast
+        self.health = health or WebdisHealth()
+        self._log = log
+        self._sess = None  # created on first use, inside the running event loop
+
+    # ---------- transport ----------
+    def url(self, *parts):
+        return self.base + "/" + "/".join(parse.quote(str(p), safe="") for p in parts) + ".json"
+
+    def _session(self):
+        if self._sess is None or self._sess.closed:
+            self._sess = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._sess
+
+    async def get_text(self, url, timeout=None):
+        """GET url with a per-call deadline; returns text or None (immediately while known down)."""
+        if self.fail_fast and self.health.known_down():
+            return None
+        deadline = aiohttp.ClientTimeout(total=self.timeout if timeout is None else timeout)
+        try:
+            async with self._session().get(url, timeout=deadline) as r:
+                text = await r.text()
+                status = r.status
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.health.record(False)
+            self._note(f"GET {url} failed: {e!r}")
+            return None
+        self.health.record(True)
+        if status >= 400:
+            self._note(f"GET {url} -> HTTP {status}")
+            return None
+        return text
+
+    async def call(self, cmd, *args, timeout=None):
+        raw = await self.get_text(self.url(cmd, *args), timeout=timeout)
+        if raw is None:
+            return None
+        try:
+            payload = json.loads(raw)
+        except ValueError:
+            return None
+        return payload if isinstance(payload, dict) else None
+
+    def _note(self, msg):
+        if self._log:
+            self._log(f"[webdis] {msg}")
+
+    def known_down(self):
+        return self.health.known_down()
+
+    async def close(self):
+        if self._sess is not None and not self._sess.closed:
+            await self._sess.close()
+        self._sess = None
+
+    # ---------- commands ----------
+    async def ping(self, timeout=None):
+        return await self.call("PING", timeout=timeout) is not None
+
+    async def get(self, key):
+        return decode_reply(await self.call("GET", key), "GET")
+
+    async def set(self, key, value):
+        return reply_ok(await self.call("SET", key, value), "SET")
+
+    async def publish(self, channel, message):
+        return await self.call("PUBLISH", channel, message) is not None
+
+    async def keys(self, pattern):
+        payload = await self.call("KEYS", pattern)
+        found = payload.get("KEYS") if payload else None
+        if not isinstance(found, list):
+            return None
+        return [k for k in found if isinstance(k, str)]
+
+    async def mget(self, keys):
+        """Decoded values aligned with keys; chunks of batch keys are fetched concurrently."""
+        chunks = [keys[i:i + self.batch] for i in range(0, len(keys), self.batch)]
+        payloads = await asyncio.gather(*(self.call("MGET", *c) for c in chunks))
+        out = []
+        for chunk, payload in zip(chunks, payloads):
+            data = payload.get("MGET") if payload else None
+            if not isinstance(data, list) or len(data) != len(chunk):
+                return None
+            out.extend(decode_value(v) for v in data)
+        return out
+
+    async def mset(self, mapping):
+        items = list(mapping.items())
+        chunks = [[x for kv in items[i:i + self.batch] for x in kv] for i in range(0, len(items), self.batch)]
+        replies = await asyncio.gather(*(self.call("MSET", *c) for c in chunks))
+        return all(reply_ok(r, "MSET") for r in replies)
+
+    def pipeline(self, transaction=False):
+        return AsyncPipeline(self, transaction)
+
+    async def execute_pipeline(self, ops, transaction=False):
+        """
+        Same coalescing as WebdisClient.execute_pipeline: SETs become one MSET and GETs one
+        MGET (run concurrently); the remaining commands follow once the writes have landed.
+        If the MSET fails, PUBLISHes are skipped (result False), so a PUBLISH never announces
+        a value subscribers cannot read.
+        """
+        results = [None] * len(ops)
+        sets = {}
+        for cmd, args in ops:
+            if cmd == "SET":
+                sets[args[0]] = args[1]
+        gets = [i for i, (cmd, _) in enumerate(ops) if cmd == "GET"]
+
+        async def _nothing():
+            return None
+
+        ok, vals = await asyncio.gather(
+            self.mset(sets) if sets else _nothing(),
+            self.mget([ops[i][1][0] for i in gets]) if gets else _nothing())
+        for i, (cmd, _) in enumerate(ops):
+            if cmd == "SET":
+                results[i] = ok
+        for n, i in enumerate(gets):
+            results[i] = None if vals is None else vals[n]
+
+        skip = ("SET", "GET", "PUBLISH") if sets and not ok else ("SET", "GET")
+        rest = []
+        for i, (cmd, _) in enumerate(ops):
+            if cmd not in skip:
+                rest.append(i)
+            elif cmd == "PUBLISH":
+                results[i] = False
+        replies = await asyncio.gather(*(
+            self.publish(*ops[i][1]) if ops[i][0] == "PUBLISH" else self.call(ops[i][0], *ops[i][1])
+            for i in rest))
+        for i, reply in zip(rest, replies):
+            results[i] = reply
+        return results
+
+    # ---------- pub/sub ----------
+    async def subscribe(self, channels, idle_timeout=None, on_subscribe=None):
+        """
+        Async generator of (channel, message) from one Webdis SUBSCRIBE stream; on_subscribe()
+        (a plain callable) runs once Webdis has accepted the subscription.
+        """
+        url = self.base + "/SUBSCRIBE/" + "/".join(parse.quote(c, safe="") for c in channels)
+        deadline = aiohttp.ClientTimeout(total=None, connect=self.timeout, sock_read=idle_timeout)
+        async with self._session().get(url, timeout=deadline) as r:
+            if r.status != 200:
+                return
+            self.health.record(True)
+            if on_subscribe:
+                on_subscribe()
+            stream = SubscribeStream()
+            async for chunk in r.content.iter_any():
+                for msg in stream.feed(chunk):
+                    yield msg
+
+
+class AsyncPipeline(Pipeline):
+    """Pipeline whose execute() is awaited: results = await client.pipeline().set(...).execute()"""
+
+    async def execute(self):
+        ops, self._ops = self._ops, []
+        if not ops:
+            return []
+        return await self._client.execute_pipeline(ops, self._transaction)
@@ -0,0 +1,371 @@
+# webdislib/client.py
+# Pooled keep-alive Webdis client with batching helpers.
+
+import json
+import time
+import codecs
+import threading
+import http.client
+from urllib import parse
+
+try:
+    import requests
+except Exception:
+    requests = None
+
+from .values import decode_value, decode_reply, reply_ok
+
+# Defaults; every client can override them
+TIMEOUT = 5.0
+MGET_BATCH = 128           # max keys per MGET/MSET URL
+HEALTH_DOWN_TTL = 2.0      # seconds to fail fast after Webdis stops answering
+HEALTH_BACKOFF_MAX = 20.0  # cap for the doubling fail-fast window
+
+
+class WebdisHealth:
+    """
+    Webdis reachability learned as a side effect of real requests (no dedicated PINGs).
+    After a connection failure Webdis is 'known down' for down_ttl seconds, doubling
+    on each further failure up to backoff_max; requests fail fast inside that window
+    and the first request after it doubles as the probe.
+    """
+
+    def __init__(self, down_ttl=HEALTH_DOWN_TTL, backoff_max=HEALTH_BACKOFF_MAX):
+        self.down_ttl = down_ttl
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+        self.up = None        # None = never contacted
+        self.failures = 0
+        self.retry_at = 0.0
+
+    def record(self, reachable):
+        with self._lock:
+            if reachable:
+                self.up = True
+                self.failures = 0
+                self.retry_at = 0.0
+            else:
+                self.up = False
+                self.failures += 1
+                backoff = min(self.backoff_max, self.down_ttl * 2 ** (self.failures - 1))
+                self.retry_at = time.monotonic() + backoff
+
+    def known_down(self):
+        return self.up is False and time.monotonic() < self.retry_at
+
+
+class BaseClient:
+    """
+    Redis commands on top of a transport's call(cmd, *args), which returns a Webdis-style
+    reply dict ({"GET": value}) or None when unreachable. Subclasses add call(),
+    execute_pipeline() and subscribe().
+    """
+
+    batch = MGET_BATCH
+
+    # ---------- commands ----------
+    def ping(self, timeout=None):
+        return self.call("PING", timeout=timeout) is not None
+
+    def get(self, key):
+        """Decoded value of key, or None if missing/unreachable."""
+        return decode_reply(self.call("GET", key), "GET")
+
+    def set(self, key, value):
+        return reply_ok(self.call("SET", key, value), "SET")
+
+    def publish(self, channel, message):
+        return self.call("PUBLISH", channel, message) is not None
+
+    def keys(self, pattern):
+        """List of key names matching pattern, or None if unreachable."""
+        payload = self.call("KEYS", pattern)
+        found = payload.get("KEYS") if payload else None
+        if not isinstance(found, list):
+            return None
+        return [k for k in found if isinstance(k, str)]
+
+    def mget(self, keys):
+        """
+        Decoded values aligned with keys (None where missing), in ceil(len/batch) requests.
+        Returns None if any request fails.
+        """
+        out = []
+        for i in range(0, len(keys), self.batch):
+            chunk = keys[i:i + self.batch]
+            payload = self.call("MGET", *chunk)
+            data = payload.get("MGET") if payload else None
+            if not isinstance(data, list) or len(data) != len(chunk):
+                return None
+            out.extend(decode_value(v) for v in data)
+        return out
+
+    def mset(self, mapping):
+        """SET every key in mapping; a single MSET (atomic) unless it exceeds batch keys."""
+        items = list(mapping.items())
+        for i in range(0, len(items), self.batch):
+            args = [x for kv in items[i:i + self.batch] for x in kv]
+            if not reply_ok(self.call("MSET", *args), "MSET"):
+                return False
+        return True
+
+    def pipeline(self, transaction=False):
+        return Pipeline(self, transaction)
+
+    def known_down(self):
+        """True while no transport is expected to answer; callers may bail out without a request."""
+        return self.health.known_down()
+
+
+class WebdisClient(BaseClient):
+    """
+    Keep-alive HTTP client for Webdis's URL API.
+    Uses a pooled requests.Session when available, otherwise one persistent
+    http.client connection per host (and per thread), so repeated calls skip the TCP handshake.
+    Reads return None when Webdis is unreachable; writes return False.
+    """
+
+    def __init__(self, base, timeout=TIMEOUT, pool_size=4, batch=MGET_BATCH,
+                 fail_fast=True, health=None, log=None):
+        self.base = base.rstrip("/")
+        self.timeout = timeout
+        self.batch = batch
+        self.fail_fast = fail_fast
+        self.health = health or WebdisHealth()
+        self._log = log
+        self._local = threading.local()
+        self._sess = None
+        if requests:
+            self._sess = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+            self._sess.mount("http://", adapter)
+            self._sess.mount("https://", adapter)
+
+    # ---------- transport ----------
+    def url(self, *parts):
+        """Build a JSON command URL: url("GET", "a b") -> base/GET/a%20b.json"""
+        return self.base + "/" + "/".join(parse.quote(str(p), safe="") for p in parts) + ".json"
+
+    def get_text(self, url, timeout=None):
+        """
+        GET url with a per-call deadline (defaults to self.timeout); returns text or None.
+        Returns None immediately while Webdis is known down (if fail_fast).
+        """
+        if self.fail_fast and self.health.known_down():
+            return None
+        timeout = self.timeout if timeout is None else timeout
+        if self._sess is not None:
+            try:
+                r = self._sess.get(url, timeout=timeout)
+            except Exception as e:
+                self.health.record(False)
+                self._note(f"GET {url} failed: {e}")
+                return None
+            self.health.record(True)
+            if not r.ok:
+                self._note(f"GET {url} -> HTTP {r.status_code}")
+                return None
+            return r.text
+        reachable, text = self._urllib_get(url, timeout)
+        self.health.record(reachable)
+        if text is None:
+            self._note(f"GET {url} failed")
+        return text
+
+    def call(self, cmd, *args, timeout=None):
+        """Run one Redis command; returns the parsed JSON reply dict or None."""
+        raw = self.get_text(self.url(cmd, *args), timeout=timeout)
+        if raw is None:
+            return None
+        try:
+            payload = json.loads(raw)
+        except ValueError:
+            return None
+        return payload if isinstance(payload, dict) else None
+
+    def _note(self, msg):
+        if self._log:
+            self._log(f"[webdis] {msg}")
+
+    def _urllib_get(self, url, timeout):
+        """Returns (reachable, text)."""
+        u = parse.urlsplit(url)
+        path = u.path or "/"
+        if u.query:
+            path += "?" + u.query
+        # A pooled connection may have been closed by the server; retry once on a fresh one
+        for attempt in range(2):
+            conn = self._conn(u.scheme, u.netloc, timeout)
+            try:
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                conn.request("GET", path, headers={"Connection": "keep-alive"})
+                resp = conn.getresponse()
+                body = resp.read()
+                if resp.will_close:
+                    self._drop(u.scheme, u.netloc)
+                if resp.status >= 400:
+                    return True, None
+                return True, body.decode("utf-8")
+            except (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                    ConnectionResetError, BrokenPipeError):
+                self._drop(u.scheme, u.netloc)
+                if attempt:
+                    return False, None
+            except Exception:
+                self._drop(u.scheme, u.netloc)
+                return False, None
+        return False, None
+
+    def _conn(self, scheme, netloc, timeout):
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+        conn = conns.get((scheme, netloc))
+        if conn is None:
+            cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conn = conns[(scheme, netloc)] = cls(netloc, timeout=timeout)
+        return conn
+
+    def _drop(self, scheme, netloc):
+        conn = getattr(self._local, "conns", {}).pop((scheme, netloc), None)
+        if conn is not None:
+            conn.close()
+
+    def close(self):
+        if self._sess is not None:
+            self._sess.close()
+        for conn in getattr(self._local, "conns", {}).values():
+            conn.close()
+        self._local.conns = {}
+
+    def execute_pipeline(self, ops, transaction=False):
+        """
+        Webdis's URL API cannot hold MULTI/EXEC open across requests, so queued SETs go out
+        as one MSET (atomic in Redis) and GETs as one MGET; any other command runs afterwards,
+        in order, on the same warm connection. If the MSET fails, PUBLISHes are skipped
+        (result False) so subscribers are never told about values Redis does not hold.
+        """
+        results = [None] * len(ops)
+
+        ok = True
+        sets = {}
+        for cmd, args in ops:
+            if cmd == "SET":
+                sets[args[0]] = args[1]  # last write per key wins, as it would sequentially
+        if sets:
+            ok = self.mset(sets)
+            for i, (cmd, _) in enumerate(ops):
+                if cmd == "SET":
+                    results[i] = ok
+
+        gets = [i for i, (cmd, _) in enumerate(ops) if cmd == "GET"]
+        if gets:
+            vals = self.mget([ops[i][1][0] for i in gets])
+            for n, i in enumerate(gets):
+                results[i] = None if vals is None else vals[n]
+
+        for i, (cmd, args) in enumerate(ops):
+            if cmd == "PUBLISH":
+                results[i] = self.publish(*args) if ok else False
+            elif cmd not in ("SET", "GET"):
+                results[i] = self.call(cmd, *args)
+        return results
+
+    # ---------- pub/sub ----------
+    def subscribe(self, channels, idle_timeout=None, on_subscribe=None):
+        """
+        Hold one Webdis SUBSCRIBE stream open and yield (channel, message) until it ends.
+        idle_timeout bounds the silence between messages (socket.timeout is raised past it).
+        on_subscribe() is called once Webdis has accepted the subscription, e.g. to re-read
+        state that may have changed while no stream was open.
+        """
+        u = parse.urlsplit(self.base)
+        path = (u.path.rstrip("/") + "/SUBSCRIBE/"
+                + "/".join(parse.quote(c, safe="") for c in channels))
+        cls = http.client.HTTPSConnection if u.scheme == "https" else http.client.HTTPConnection
+        conn = cls(u.netloc, timeout=self.timeout)
+        try:
+            conn.request("GET", path)
+            resp = conn.getresponse()
+            if resp.status != 200:
+                return
+            self.health.record(True)
+            if on_subscribe:
+                on_subscribe()
+            conn.sock.settimeout(idle_timeout)
+            stream = SubscribeStream()
+            while True:
+                chunk = resp.read1(4096)
+                if not chunk:
+                    return
+                yield from stream.feed(chunk)
+        finally:
+            conn.close()
+
+
+class SubscribeStream:
+    """Incremental parser for Webdis's chunked SUBSCRIBE output (concatenated JSON objects)."""
+
+    def __init__(self):
+        self._dec = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")("replace")
+        self._buf = ""
+
+    def feed(self, chunk):
+        """Messages completed by chunk, as a list of (channel, message)."""
+        out = []
+        buf = self._buf + self._utf8.decode(chunk)
+        while True:
+            buf = buf.lstrip()
+            if not buf:
+                break
+            try:
+                obj, end = self._dec.raw_decode(buf)
+            except ValueError:
+                break
+            buf = buf[end:]
+            data = obj.get("SUBSCRIBE") if isinstance(obj, dict) else None
+            if isinstance(data, list) and len(data) == 3 and data[0] == "message":
+                out.append((data[1], data[2]))
+        self._buf = buf
+        return out
+
+
+class Pipeline:
+    """
+    Queue commands, then hand them to the client's transport in one go: true pipelining
+    (optionally MULTI/EXEC) over RESP, MSET/MGET coalescing over Webdis HTTP.
+    execute() returns results aligned with the queue order: bool for SET/PUBLISH,
+    the decoded value for GET, the reply dict for anything else.
+    """
+
+    def __init__(self, client, transaction=False):
+        self._client = client
+        self._transaction = transaction
+        self._ops = []
+
+    def get(self, key):
+        self._ops.append(("GET", (key,)))
+        return self
+
+    def set(self, key, value):
+        self._ops.append(("SET", (key, value)))
+        return self
+
+    def publish(self, channel, message):
+        self._ops.append(("PUBLISH", (channel, message)))
+        return self
+
+    def command(self, cmd, *args):
+        self._ops.append((cmd.upper(), args))
+        return self
+
+    def __len__(self):
+        return len(self._ops)
+
+    def execute(self):
+        ops, self._ops = self._ops, []
+        if not ops:
+            return []
+        return self._client.execute_pipeline(ops, self._transaction)
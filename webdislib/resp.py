@@ -0,0 +1,270 @@
+# webdislib/resp.py
+# Direct Redis (RESP) transport with pipelining, falling back to Webdis HTTP.
+
+import socket
+import threading
+from urllib import parse
+
+from .client import BaseClient, WebdisClient, WebdisHealth, TIMEOUT, MGET_BATCH
+from .values import decode_value
+
+
+class RespError(Exception):
+    """Error reply from Redis (-ERR ...)."""
+
+
+def _auth_error(reply):
+    """True for the replies Redis gives every command on an unauthenticated connection."""
+    return isinstance(reply, RespError) and str(reply).startswith(("NOAUTH", "WRONGPASS"))
+
+
+class RespConnection:
+    """One persistent socket to Redis speaking RESP2."""
+
+    def __init__(self, host, port, timeout=TIMEOUT, password=None, db=0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._rfile = self.sock.makefile("rb")
+        setup = ([("AUTH", password)] if password else []) + ([("SELECT", db)] if db else [])
+        for command in setup:
+            reply = self.execute([command])[0]
+            if isinstance(reply, RespError):
+                # A connection Redis refuses commands on is no connection: let callers fall back
+                self.close()
+                raise ConnectionError(f"Redis {command[0]} failed: {reply}")
+
+    @staticmethod
+    def encode(args):
+        out = [b"*%d\r\n" % len(args)]
+        for a in args:
+            b = a if isinstance(a, bytes) else str(a).encode("utf-8")
+            out.append(b"$%d\r\n%s\r\n" % (len(b), b))
+        return b"".join(out)
+
+    def send(self, commands):
+        """Write every command in one sendall (pipelining)."""
+        self.sock.sendall(b"".join(self.encode(c) for c in commands))
+
+    def read_reply(self):
+        line = self._rfile.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Redis closed the connection")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode("utf-8", "replace")
+        if kind == b"-":
+            return RespError(rest.decode("utf-8", "replace"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            n = int(rest)
+            if n < 0:
+                return None
+            data = self._rfile.read(n + 2)
+            if len(data) != n + 2:
+                raise ConnectionError("Redis closed the connection")
+            return data[:-2].decode("utf-8", "replace")
+        if kind == b"*":
+            n = int(rest)
+            if n < 0:
+                return None
+            return [self.read_reply() for _ in range(n)]
+        raise ConnectionError(f"Bad RESP reply type {kind!r}")
+
+    def execute(self, commands, timeout=None):
+        """Pipeline commands and return their replies in order (errors as RespError values)."""
+        if timeout is not None:
+            self.sock.settimeout(timeout)
+        self.send(commands)
+        return [self.read_reply() for _ in commands]
+
+    def close(self):
+        try:
+            self._rfile.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def _as_webdis(cmd, reply):
+    """
+    Shape a RESP reply like a Webdis JSON reply so BaseClient helpers decode both alike.
+    An error reply reads as a missing value (and a failed write), never as data.
+    """
+    if isinstance(reply, RespError):
+        return {cmd: None}
+    return {cmd: reply}
+
+
+class RespClient(BaseClient):
+    """
+    Talks RESP straight to Redis over one persistent socket per thread, skipping Webdis's
+    URL encoding, HTTP parse and JSON decode. While Redis is unreachable every call goes to
+    the optional fallback client (normally a WebdisClient) instead.
+    """
+
+    def __init__(self, redis_url, timeout=TIMEOUT, batch=MGET_BATCH, fallback=None,
+                 health=None, log=None):
+        u = parse.urlsplit(redis_url)
+        self.host = u.hostname or "127.0.0.1"
+        self.port = u.port or 6379
+        self.password = parse.unquote(u.password) if u.password else None
+        self.db = int(u.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self.batch = batch
+        self.fallback = fallback
+        self.health = health or WebdisHealth()
+        self._log = log
+        self._local = threading.local()
+
+    # ---------- transport ----------
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = RespConnection(self.host, self.port, self.timeout, self.password, self.db)
+        return conn
+
+    def _drop(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+        self._local.conn = None
+
+    def _execute(self, commands, timeout=None):
+        """Replies for commands, or None if Redis is unreachable (caller falls back)."""
+        if self.health.known_down():
+            return None
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            replies = self._conn().execute(commands, timeout)
+            if any(_auth_error(r) for r in replies):
+                raise ConnectionError(f"not authenticated: {next(r for r in replies if _auth_error(r))}")
+        except (OSError, ConnectionError, ValueError) as e:
+            self._drop()
+            self.health.record(False)
+            if self._log:
+                self._log(f"[redis] {self.host}:{self.port} failed: {e}")
+            return None
+        self.health.record(True)
+        return replies
+
+    def call(self, cmd, *args, timeout=None):
+        replies = self._execute([(cmd,) + args], timeout)
+        if replies is None:
+            return self.fallback.call(cmd, *args, timeout=timeout) if self.fallback else None
+        return _as_webdis(cmd, replies[0])
+
+    def known_down(self):
+        if not self.health.known_down():
+            return False
+        return self.fallback is None or self.fallback.known_down()
+
+    def close(self):
+        self._drop()
+        if self.fallback:
+            self.fallback.close()
+
+    # ---------- batching ----------
+    def execute_pipeline(self, ops, transaction=False):
+        """
+        Send every queued command in one write; wrap in MULTI/EXEC when transaction is set.
+        When SETs and PUBLISHes are queued together the PUBLISHes follow in a second write,
+        only once every SET replied OK (result False otherwise), so subscribers are never
+        told about values Redis does not hold.
+        """
+        has_sets = any(cmd == "SET" for cmd, _ in ops)
+        pubs = [i for i, (cmd, _) in enumerate(ops) if cmd == "PUBLISH"] if has_sets else []
+        first = [i for i, (cmd, _) in enumerate(ops) if not (has_sets and cmd == "PUBLISH")]
+
+        replies = self._send([ops[i] for i in first], transaction)
+        if replies is None:
+            if self.fallback:
+                return self.fallback.execute_pipeline(ops, transaction)
+            return [None] * len(ops)
+
+        results = [None] * len(ops)
+        for i, reply in zip(first, replies):
+            results[i] = self._result(ops[i][0], reply)
+        if pubs:
+            sets_ok = all(results[i] for i, (cmd, _) in enumerate(ops) if cmd == "SET")
+            replies = self._send([ops[i] for i in pubs]) if sets_ok else None
+            for n, i in enumerate(pubs):
+                results[i] = False if replies is None else self._result("PUBLISH", replies[n])
+        return results
+
+    def _send(self, ops, transaction=False):
+        """RESP replies for ops (EXEC's results when transaction is set), or None if Redis is unreachable."""
+        if not ops:
+            return []
+        commands = [(cmd,) + tuple(args) for cmd, args in ops]
+        if not transaction:
+            return self._execute(commands)
+        replies = self._execute([("MULTI",)] + commands + [("EXEC",)])
+        if replies is None:
+            return None
+        # MULTI and each queued command reply +OK/+QUEUED; EXEC carries the results
+        return replies[-1] if isinstance(replies[-1], list) else [replies[-1]] * len(ops)
+
+    @staticmethod
+    def _result(cmd, reply):
+        if cmd == "SET":
+            return reply == "OK"
+        if cmd == "GET":
+            return None if isinstance(reply, RespError) else decode_value(reply)
+        if cmd == "PUBLISH":
+            return not isinstance(reply, RespError)
+        return _as_webdis(cmd, reply)
+
+    # ---------- pub/sub ----------
+    def subscribe(self, channels, idle_timeout=None, on_subscribe=None):
+        """
+        Yield (channel, message) from a dedicated SUBSCRIBE socket; Webdis stream if Redis is down.
+        on_subscribe() is called once Redis has confirmed every channel.
+        """
+        try:
+            conn = RespConnection(self.host, self.port, self.timeout, self.password, self.db)
+        except OSError:
+            self.health.record(False)
+            if self.fallback:
+                yield from self.fallback.subscribe(channels, idle_timeout, on_subscribe)
+            return
+        try:
+            conn.send([("SUBSCRIBE",) + tuple(channels)])
+            conn.sock.settimeout(idle_timeout)
+            pending = len(channels)
+            while True:
+                msg = conn.read_reply()
+                if isinstance(msg, list) and len(msg) == 3 and msg[0] == "message":
+                    yield msg[1], msg[2]
+                elif isinstance(msg, list) and msg and msg[0] == "subscribe" and pending:
+                    if pending == len(channels):
+                        self.health.record(True)
+                    pending -= 1
+                    if not pending and on_subscribe:
+                        on_subscribe()
+                elif _auth_error(msg):
+                    break
+        finally:
+            conn.close()
+        # Only reached when Redis refused the SUBSCRIBE for want of AUTH
+        self.health.record(False)
+        if self.fallback:
+            yield from self.fallback.subscribe(channels, idle_timeout, on_subscribe)
+
+
+def connect(webdis_url=None, redis_url=None, timeout=TIMEOUT, batch=MGET_BATCH, health=None, log=None):
+    """
+    Pick a transport: RESP to redis_url when given (with Webdis as fallback if webdis_url
+    is also given), otherwise Webdis HTTP.
+    """
+    webdis = None
+    if webdis_url:
+        webdis = WebdisClient(webdis_url, timeout, batch=batch, log=log,
+                              health=WebdisHealth(health.down_ttl, health.backoff_max) if health else None)
+    if redis_url:
+        return RespClient(redis_url, timeout, batch=batch, fallback=webdis, health=health, log=log)
+    if webdis is None:
+        raise ValueError("connect() needs webdis_url or redis_url")
+    if health is not None:
+        webdis.health = health
+    return webdis
@@ -0,0 +1,44 @@
+# webdislib/values.py
+# One decoder for the shapes Webdis wraps Redis replies in.
+
+def decode_value(v):
+    """
+    Normalize one Webdis reply value to a stripped string, or None when missing.
+    Handles {"value": x}, status lists like ["OK","1"] / [true,"PONG"], bools and numbers:
+      "1" -> "1", 1 -> "1", True -> "1", ["OK","1"] -> "1", {"value": "x"} -> "x", null -> None
+    """
+    if isinstance(v, dict):
+        return decode_value(v.get("value"))
+    if isinstance(v, list):
+        # Webdis may prefix the value with a status; take the last non-status item
+        for item in reversed(v):
+            s = decode_value(item)
+            if s is not None and s.lower() != "ok":
+                return s
+        return None
+    if isinstance(v, bool):
+        return "1" if v else "0"
+    if isinstance(v, (int, float)):
+        return str(v)
+    if isinstance(v, str):
+        return v.strip()
+    return None
+
+def decode_reply(payload, cmd):
+    """Decode the value under cmd in a Webdis JSON reply ({"GET": ...}); None if absent."""
+    if not isinstance(payload, dict) or cmd not in payload:
+        return None
+    return decode_value(payload[cmd])
+
+def reply_ok(payload, cmd):
+    """True when a write command (SET/MSET/...) reply reports success."""
+    if not isinstance(payload, dict) or cmd not in payload:
+        return False
+    v = payload[cmd]
+    if isinstance(v, list):
+        return bool(v) and v[0] in (True, "OK")
+    return v in (True, "OK")
+
+def truthy(v):
+    """Game-wide boolean convention for flag values."""
+    return v is not None and str(v).strip().lower() in ("1", "true", "on", "yes")